@@ -18,6 +18,28 @@ const PHASE_SELECT = "select";
 const PHASE_RECORDING = "recording";
 const PHASE_PREVIEW = "preview";
 
+// Server-side analysis stages → short labels for the progress button
+const STAGE_LABELS = {
+  audio_extraction: "Extracting audio",
+  facial_analysis: "Reading expressions",
+  transcription: "Transcribing",
+  vocal_emotion: "Analyzing voice",
+  linguistic_analysis: "Analyzing language",
+  vocabulary_report: "Vocabulary report",
+  scores: "Scoring",
+  speech_report: "Speech report",
+  expression_report: "Expression report",
+  persistence: "Saving",
+};
+
+// Status polling interval when the job's event stream can't be used
+const JOB_POLL_INTERVAL_MS = 2000;
+
+// Live microphone sessions stream 16 kHz float32 PCM to the server so
+// Whisper transcribes while the user is still speaking
+const LIVE_SAMPLE_RATE = 16000;
+const LIVE_FLUSH_MS = 2000;
+
 const WebRTCRecorder = () => {
   const router = useRouter();
   const { theme } = useTheme();
@@ -27,6 +49,8 @@ const WebRTCRecorder = () => {
   const previewAudioRef = useRef(null);
   const mediaRecorderRef = useRef(null);
   const fileInputRef = useRef(null);
+  const liveRef = useRef(null); // { sessionId, ctx, processor, source, buffers, timer, queue }
+  const isPausedRef = useRef(false);
 
   const [phase, setPhase] = useState(PHASE_SELECT);
   const [mode, setMode] = useState(null); // "video" | "audio"
@@ -37,6 +61,7 @@ const WebRTCRecorder = () => {
   const [previewUrl, setPreviewUrl] = useState(null);
   const [uploadedFile, setUploadedFile] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [analysisStage, setAnalysisStage] = useState("");
   const [audioReady, setAudioReady] = useState(false);
   const streamRef = useRef(null); // keep in sync with stream state
 
@@ -96,6 +121,80 @@ const WebRTCRecorder = () => {
     }
   }, [phase, mode]);
 
+  // ─── Live transcription (audio mode) ───
+  const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:5000";
+
+  const flushLiveAudio = () => {
+    const live = liveRef.current;
+    if (!live || live.buffers.length === 0) return live?.queue;
+    const total = live.buffers.reduce((n, b) => n + b.length, 0);
+    const pcm = new Float32Array(total);
+    let offset = 0;
+    for (const b of live.buffers) {
+      pcm.set(b, offset);
+      offset += b.length;
+    }
+    live.buffers = [];
+    // Chain the POSTs so fragments arrive in order
+    live.queue = live.queue.then(() =>
+      fetch(`${API_URL}/live/${live.sessionId}/audio`, {
+        method: "POST",
+        headers: { "Content-Type": "application/octet-stream" },
+        body: pcm.buffer,
+      }).then((res) => {
+        if (!res.ok) throw new Error("Live upload failed");
+      })
+    ).catch((err) => {
+      console.warn("Live transcription disabled:", err);
+      live.failed = true;
+    });
+    return live.queue;
+  };
+
+  const startLiveStream = async (s) => {
+    try {
+      const res = await fetch(`${API_URL}/live`, { method: "POST" });
+      if (!res.ok) return;
+      const { sessionId } = await res.json();
+      const ctx = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: LIVE_SAMPLE_RATE });
+      const source = ctx.createMediaStreamSource(s);
+      const processor = ctx.createScriptProcessor(4096, 1, 1);
+      const live = { sessionId, ctx, source, processor, buffers: [], queue: Promise.resolve(), failed: false };
+      processor.onaudioprocess = (e) => {
+        if (!isPausedRef.current) live.buffers.push(new Float32Array(e.inputBuffer.getChannelData(0)));
+      };
+      source.connect(processor);
+      processor.connect(ctx.destination);
+      live.timer = setInterval(flushLiveAudio, LIVE_FLUSH_MS);
+      liveRef.current = live;
+    } catch (err) {
+      // Fall back to a normal upload after recording
+      console.warn("Could not start live transcription:", err);
+    }
+  };
+
+  // Stop capturing; resolves once every fragment has been sent, also when
+  // the stream was already stopped (finishRecording doesn't wait for it)
+  const stopLiveStream = async () => {
+    const live = liveRef.current;
+    if (!live) return;
+    if (live.stopped) return live.queue;
+    live.stopped = true;
+    clearInterval(live.timer);
+    live.processor.disconnect();
+    live.source.disconnect();
+    live.ctx.close().catch(() => {});
+    await flushLiveAudio();
+  };
+
+  const discardLiveStream = () => {
+    const live = liveRef.current;
+    if (!live) return;
+    stopLiveStream();
+    fetch(`${API_URL}/live/${live.sessionId}`, { method: "DELETE" }).catch(() => {});
+    liveRef.current = null;
+  };
+
   // ─── Actually start recording ───
   const beginRecording = () => {
     const s = streamRef.current;
@@ -120,8 +219,10 @@ const WebRTCRecorder = () => {
       setPhase(PHASE_PREVIEW);
     };
     mr.start();
+    if (!isVideo) startLiveStream(s);
     setIsRecording(true);
     setIsPaused(false);
+    isPausedRef.current = false;
   };
 
   // ─── Pause / Resume ───
@@ -133,6 +234,7 @@ const WebRTCRecorder = () => {
       mediaRecorderRef.current.pause();
     }
     setIsPaused(!isPaused);
+    isPausedRef.current = !isPaused;
   };
 
   // ─── Finish recording ───
@@ -140,6 +242,7 @@ const WebRTCRecorder = () => {
     if (mediaRecorderRef.current && mediaRecorderRef.current.state !== "inactive") {
       mediaRecorderRef.current.stop();
     }
+    stopLiveStream();
     stopAllTracks();
     streamRef.current = null;
     setIsRecording(false);
@@ -159,6 +262,7 @@ const WebRTCRecorder = () => {
       return;
     }
     const isVideo = file.type.startsWith("video");
+    discardLiveStream();
     setMode(isVideo ? "video" : "audio");
     setUploadedFile(file);
     setRecordedChunks([]);
@@ -168,6 +272,7 @@ const WebRTCRecorder = () => {
 
   // ─── Back to selection ───
   const backToSelect = () => {
+    discardLiveStream();
     stopAllTracks();
     streamRef.current = null;
     if (mediaRecorderRef.current && mediaRecorderRef.current.state !== "inactive") {
@@ -189,6 +294,7 @@ const WebRTCRecorder = () => {
 
   // ─── Re-record ───
   const reRecord = () => {
+    discardLiveStream();
     if (previewUrl) URL.revokeObjectURL(previewUrl);
     setPreviewUrl(null);
     setAudioReady(false);
@@ -197,6 +303,48 @@ const WebRTCRecorder = () => {
     enterRecordingScreen(mode);
   };
 
+  // ─── Poll the job status (used when the progress stream is unavailable) ───
+  const pollJob = async (API, jobId) => {
+    for (;;) {
+      const response = await fetch(`${API}/jobs/${jobId}`);
+      if (response.status === 404) throw new Error("Analysis job not found");
+      if (response.ok) {
+        const job = await response.json();
+        if (job.status === "done") return job.reportId;
+        if (job.status === "failed") throw new Error(job.error || "Analysis failed");
+      }
+      await new Promise((r) => setTimeout(r, JOB_POLL_INTERVAL_MS));
+    }
+  };
+
+  // ─── Follow the analysis job's progress stream until the report is ready ───
+  const waitForJob = (API, jobId) =>
+    new Promise((resolve, reject) => {
+      const source = new EventSource(`${API}/jobs/${jobId}/events`);
+      source.onerror = () => {
+        // Transient drops reconnect on their own (readyState CONNECTING);
+        // a 404 or non-event-stream response closes the source for good
+        if (source.readyState !== EventSource.CLOSED) return;
+        setAnalysisStage("Waiting for analysis...");
+        pollJob(API, jobId).then(resolve, reject);
+      };
+      source.addEventListener("stage", (e) => {
+        const data = JSON.parse(e.data);
+        setAnalysisStage(STAGE_LABELS[data.stage] || data.stage);
+        if (data.stage === "transcription" && data.status === "done") {
+          toast.info("Transcript ready — generating feedback...", { autoClose: 2000 });
+        }
+      });
+      source.addEventListener("done", (e) => {
+        source.close();
+        resolve(JSON.parse(e.data).reportId);
+      });
+      source.addEventListener("failed", (e) => {
+        source.close();
+        reject(new Error(JSON.parse(e.data).error || "Analysis failed"));
+      });
+    });
+
   // ─── Send / Upload ───
   const handleSend = async () => {
     if (!title.trim()) {
@@ -230,20 +378,47 @@ const WebRTCRecorder = () => {
 
     try {
       const token = localStorage.getItem("token");
-      const API = process.env.NEXT_PUBLIC_API_URL || "http://localhost:5000";
-      const response = await fetch(`${API}/upload`, {
-        method: "POST",
-        headers: { Authorization: `Bearer ${token}` },
-        body: formData,
-      });
+      const API = API_URL;
+
+      // A live recording was already transcribed while the user spoke;
+      // finishing it only sends the session details, not the audio
+      let jobId = null;
+      const live = liveRef.current;
+      // Wait for the last fragment before checking whether streaming failed
+      // and before /finish, which closes the server-side session
+      if (live && !uploadedFile) await stopLiveStream();
+      if (live && !uploadedFile && !live.failed) {
+        const liveForm = new FormData();
+        liveForm.append("context", context);
+        liveForm.append("title", title || "Untitled Session");
+        liveForm.append("userId", userId);
+        const liveResponse = await fetch(`${API}/live/${live.sessionId}/finish`, {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+          body: liveForm,
+        }).catch(() => null);
+        liveRef.current = null;
+        if (liveResponse && liveResponse.ok) {
+          ({ jobId } = await liveResponse.json());
+        }
+      }
+
+      if (!jobId) {
+        const response = await fetch(`${API}/upload`, {
+          method: "POST",
+          headers: { Authorization: `Bearer ${token}` },
+          body: formData,
+        });
+
+        if (!response.ok) {
+          const errData = await response.json().catch(() => ({}));
+          throw new Error(errData.error || "Upload failed");
+        }
 
-      if (!response.ok) {
-        const errData = await response.json().catch(() => ({}));
-        throw new Error(errData.error || "Upload failed");
+        ({ jobId } = await response.json());
       }
 
-      const data = await response.json();
-      const reportId = data._id;
+      const reportId = await waitForJob(API, jobId);
 
       toast.success("Report generated! Redirecting...", { autoClose: 2000 });
 
@@ -257,6 +432,7 @@ const WebRTCRecorder = () => {
       toast.error(error.message || "Upload failed. Please try again.");
     } finally {
       setLoading(false);
+      setAnalysisStage("");
     }
   };
 
@@ -486,7 +662,7 @@ const WebRTCRecorder = () => {
                       <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4" fill="none" />
                       <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4z" />
                     </svg>
-                    Analyzing...
+                    {analysisStage ? `${analysisStage}...` : "Analyzing..."}
                   </>
                 ) : (
                   <>
@@ -8,7 +8,9 @@ This module orchestrates comprehensive speech analysis through multiple stages:
 4. Report Generation
 5. Scoring & Insights
 
-Each stage produces detailed metrics and actionable feedback.
+Each stage produces detailed metrics and actionable feedback. Stages are
+declared as a dependency graph (utils/stage_executor.py) so independent
+ones run in parallel, the same engine the Flask upload worker uses.
 """
 
 import os
@@ -20,9 +22,18 @@ import google.generativeai as genai
 # Import utility modules
 from utils.audioextraction import extract_audio_to_memory
 from utils.expressions import analyze_video_emotions
-from utils.transcription import speech_to_text_long
-from utils.vocals import predict_emotion
+from utils.transcription import speech_to_text_long, resolve_tier
+from utils.audio_cache import default_audio_cache, file_sha256
+from utils.stage_cache import default_stage_cache, hash_value
+from utils.stage_settings import (
+    transcription_settings, vocal_emotion_settings, facial_settings,
+    transcription_cacheable, vocal_emotion_cacheable, facial_cacheable,
+)
+from utils.emotion_summary import SILENCE_LABEL, summarize_vocal_emotions, format_vocal_emotion_summary
+from utils.vocals import predict_emotion, default_ser_hop_duration
 from utils.vocabulary import evaluate_vocabulary
+from utils.gemini_rate_limiter import gemini_generate_with_retry
+from utils.stage_executor import StageGraph, StageNode
 from utils.linguistic_analysis import (
     analyze_transcript_complete,
     generate_linguistic_summary
@@ -37,14 +48,18 @@ class DetailedAnalysisPipeline:
     Comprehensive speech analysis pipeline with detailed metrics at each stage
     """
     
-    def __init__(self, gemini_model_name: str = "gemini-2.5-flash"):
+    def __init__(self, gemini_model_name: str = "gemini-2.5-flash", transcription_tier: str = None):
         """
         Initialize the pipeline
         
         Args:
             gemini_model_name: Name of the Gemini model to use
+            transcription_tier: "fast", "balanced" or "accurate" Whisper
+                                settings (default: TRANSCRIPTION_TIER or "accurate")
         """
         self.gemini_model = genai.GenerativeModel(gemini_model_name)
+        self.transcription_tier = resolve_tier(transcription_tier)
+        self.stage_cache = default_stage_cache()
         self.analysis_results = {}
         self.stage_timings = {}
         
@@ -78,46 +93,27 @@ class DetailedAnalysisPipeline:
             print(f"Context: {context}")
             print(f"{'='*60}\n")
         
-        # Stage 1: Media Processing
-        audio_data, facial_emotions, mode = self._stage_1_media_processing(
-            file_path, verbose
-        )
-        
-        # Stage 2: Transcription
-        transcription = self._stage_2_transcription(audio_data, verbose)
-        
-        # Stage 3: Vocal Emotion Analysis
-        vocal_emotions = self._stage_3_vocal_emotions(audio_data, verbose)
-        
-        # Stage 4: Linguistic Analysis
-        linguistic_analysis, linguistic_summary = self._stage_4_linguistic_analysis(
-            transcription, vocal_emotions, verbose
-        )
-        
-        # Stage 5: Vocabulary Evaluation
-        vocabulary_report = self._stage_5_vocabulary_evaluation(
-            transcription, context, linguistic_analysis, verbose
-        )
-        
-        # Stage 6: Speech Report
-        speech_report = self._stage_6_speech_report(
-            transcription, context, vocal_emotions, linguistic_analysis, verbose
-        )
-        
-        # Stage 7: Expression Report
-        expression_report = self._stage_7_expression_report(
-            facial_emotions, mode, verbose
-        )
-        
-        # Stage 8: Scoring
-        scores = self._stage_8_scoring(
-            transcription, vocal_emotions, facial_emotions, linguistic_analysis, verbose
-        )
-        
-        # Stage 9: Advanced Insights
-        advanced_insights = self._stage_9_advanced_insights(
-            transcription, linguistic_analysis, vocal_emotions, verbose
+        self.stage_timings = {}
+        wall_start = time.time()
+        values, _, (critical_path, critical_time) = self._build_stage_graph().run(
+            {"file_path": file_path, "context": context, "verbose": verbose,
+             "tier": self.transcription_tier, "content_hash": file_sha256(file_path)},
+            on_skip=lambda name: self.stage_timings.setdefault(name, 0.0),
         )
+        self.stage_timings['critical_path'] = critical_time
+        self.stage_timings['wall_clock'] = time.time() - wall_start
+
+        mode = values["mode"]
+        transcription = values["transcription"]
+        facial_emotions = values["facial_emotions"]
+        vocal_emotions = values["vocal_emotions"]
+        linguistic_analysis = values["linguistic_analysis"]
+        linguistic_summary = values["linguistic_summary"]
+        vocabulary_report = values["vocabulary_report"]
+        speech_report = values["speech_report"]
+        expression_report = values["expression_report"]
+        scores = values["scores"]
+        advanced_insights = values["advanced_insights"]
         
         # Compile final results
         final_results = {
@@ -125,7 +121,9 @@ class DetailedAnalysisPipeline:
             "title": title,
             "context": context,
             "mode": mode,
+            "transcription_tier": self.transcription_tier,
             "transcription": transcription,
+            "transcript_segments": values["transcript_segments"],
             "scores": scores,
             "vocabulary_report": vocabulary_report,
             "speech_report": speech_report,
@@ -133,10 +131,12 @@ class DetailedAnalysisPipeline:
             "linguistic_analysis": linguistic_analysis,
             "linguistic_summary": linguistic_summary,
             "vocal_emotions": vocal_emotions,
-            "facial_emotions": facial_emotions.to_dict() if not facial_emotions.empty else {},
+            "facial_emotions": facial_emotions.to_dict() if facial_emotions is not None and not facial_emotions.empty else {},
             "advanced_insights": advanced_insights,
             "stage_timings": self.stage_timings,
-            "total_processing_time": sum(self.stage_timings.values())
+            "stage_cache": self.stage_cache.stats(),
+            "critical_path": critical_path,
+            "total_processing_time": self.stage_timings['wall_clock']
         }
         
         if verbose:
@@ -144,10 +144,52 @@ class DetailedAnalysisPipeline:
         
         return final_results
     
+    def _build_stage_graph(self) -> StageGraph:
+        """
+        Declare the nine stages as graph nodes with explicit inputs/outputs.
+
+        The scheduler runs every node whose inputs are ready in parallel, so
+        facial analysis, transcription and vocal emotions overlap, and the
+        Gemini stages start as soon as the linguistic analysis is done.
+        Stage 7 is skipped for audio-only input.
+        """
+        is_video = lambda values: values["mode"] == "video"
+        return StageGraph([
+            StageNode("media_processing", self._stage_1_media_processing,
+                      inputs=["file_path", "content_hash", "verbose"], outputs=["audio_data", "mode"]),
+            StageNode("facial_analysis", self._stage_1_facial_analysis,
+                      inputs=["file_path", "mode", "content_hash", "verbose"], outputs=["facial_emotions"],
+                      applies=is_video),
+            StageNode("transcription", self._stage_2_transcription,
+                      inputs=["audio_data", "tier", "content_hash", "verbose"],
+                      outputs=["transcription", "transcript_segments"]),
+            StageNode("vocal_emotions", self._stage_3_vocal_emotions,
+                      inputs=["audio_data", "content_hash", "verbose"], outputs=["vocal_emotions"]),
+            StageNode("linguistic_analysis", self._stage_4_linguistic_analysis,
+                      inputs=["transcription", "vocal_emotions", "transcript_segments", "verbose"],
+                      outputs=["linguistic_analysis", "linguistic_summary"]),
+            StageNode("vocabulary_evaluation", self._stage_5_vocabulary_evaluation,
+                      inputs=["transcription", "context", "linguistic_analysis", "verbose"],
+                      outputs=["vocabulary_report"]),
+            StageNode("speech_report", self._stage_6_speech_report,
+                      inputs=["transcription", "context", "vocal_emotions", "linguistic_analysis", "verbose"],
+                      outputs=["speech_report"]),
+            StageNode("expression_report", self._stage_7_expression_report,
+                      inputs=["facial_emotions", "mode", "verbose"], outputs=["expression_report"],
+                      applies=is_video,
+                      on_skip=lambda values: "No facial expression analysis available (audio-only mode)."),
+            StageNode("scoring", self._stage_8_scoring,
+                      inputs=["transcription", "vocal_emotions", "facial_emotions", "linguistic_analysis", "verbose"],
+                      outputs=["scores"]),
+            StageNode("advanced_insights", self._stage_9_advanced_insights,
+                      inputs=["transcription", "linguistic_analysis", "vocal_emotions", "verbose"],
+                      outputs=["advanced_insights"]),
+        ])
+    
     def _stage_1_media_processing(
-        self, file_path: str, verbose: bool
-    ) -> Tuple[Any, Any, str]:
-        """Stage 1: Extract audio and analyze facial expressions"""
+        self, file_path: str, content_hash: str, verbose: bool
+    ) -> Tuple[Any, str]:
+        """Stage 1: Extract audio"""
         start_time = time.time()
         
         if verbose:
@@ -158,22 +200,17 @@ class DetailedAnalysisPipeline:
         file_ext = file_path.rsplit('.', 1)[1].lower()
         mode = "video" if file_ext == 'mp4' else 'audio'
         
-        if mode == "video":
-            if verbose:
+        if verbose:
+            if mode == "video":
                 print("  → Extracting audio from video...")
-            audio_data = extract_audio_to_memory(file_path)
-            
-            if verbose:
-                print("  → Analyzing facial expressions...")
-            facial_emotions = analyze_video_emotions(file_path)
-            
-            if verbose:
-                print(f"  ✓ Facial emotions detected: {len(facial_emotions)} emotion types")
-        else:
-            audio_data = file_path
-            facial_emotions = None
-            if verbose:
+            else:
                 print("  → Audio-only mode (no facial analysis)")
+                print("  → Decoding audio...")
+        # Same 16 kHz decode for both modes, shared by transcription and SER;
+        # repeat runs on the same recording reuse the cached decode
+        audio_data = default_audio_cache().load(file_path, extract_audio_to_memory, key=content_hash)
+        if audio_data is None:
+            raise RuntimeError(f"Failed to decode audio from {file_path}")
         
         elapsed = time.time() - start_time
         self.stage_timings['media_processing'] = elapsed
@@ -181,30 +218,56 @@ class DetailedAnalysisPipeline:
         if verbose:
             print(f"  ⏱️  Stage 1 completed in {elapsed:.2f}s\n")
         
-        return audio_data, facial_emotions, mode
+        return audio_data, mode
+    
+    def _stage_1_facial_analysis(self, file_path: str, mode: str, content_hash: str, verbose: bool) -> Any:
+        """Stage 1 (video only): Analyze facial expressions"""
+        start_time = time.time()
+        
+        if verbose:
+            print("  → Analyzing facial expressions...")
+        
+        facial_emotions, _ = self.stage_cache.get_or_compute(
+            "facial_analysis", [content_hash, *facial_settings()], lambda: analyze_video_emotions(file_path),
+            cacheable=facial_cacheable)
+        
+        elapsed = time.time() - start_time
+        self.stage_timings['facial_analysis'] = elapsed
+        
+        if verbose:
+            print(f"  ✓ Facial emotions detected: {len(facial_emotions)} emotion types")
+            print(f"  ⏱️  Facial analysis completed in {elapsed:.2f}s\n")
+        
+        return facial_emotions
     
-    def _stage_2_transcription(self, audio_data: Any, verbose: bool) -> str:
+    def _stage_2_transcription(
+        self, audio_data: Any, tier: str, content_hash: str, verbose: bool
+    ) -> Tuple[str, List[Dict]]:
         """Stage 2: Speech-to-text transcription"""
         start_time = time.time()
         
         if verbose:
             print("🎤 STAGE 2: Transcription")
             print("-" * 60)
-            print("  → Converting speech to text...")
+            print(f"  → Converting speech to text ({tier} tier)...")
         
-        transcription = speech_to_text_long(audio_data)
+        result = self.stage_cache.get_or_compute(
+            "transcription", [content_hash, *transcription_settings(tier)],
+            lambda: speech_to_text_long(audio_data, return_segments=True, tier=tier),
+            cacheable=transcription_cacheable)
+        transcription, transcript_segments = result["text"], result["segments"]
         word_count = len(transcription.split())
         
         elapsed = time.time() - start_time
         self.stage_timings['transcription'] = elapsed
         
         if verbose:
-            print(f"  ✓ Transcription complete: {word_count} words")
+            print(f"  ✓ Transcription complete: {word_count} words in {len(transcript_segments)} segments")
             print(f"  ⏱️  Stage 2 completed in {elapsed:.2f}s\n")
         
-        return transcription
+        return transcription, transcript_segments
     
-    def _stage_3_vocal_emotions(self, audio_data: Any, verbose: bool) -> List[Dict]:
+    def _stage_3_vocal_emotions(self, audio_data: Any, content_hash: str, verbose: bool) -> List[Dict]:
         """Stage 3: Vocal emotion detection"""
         start_time = time.time()
         
@@ -213,12 +276,20 @@ class DetailedAnalysisPipeline:
             print("-" * 60)
             print("  → Analyzing vocal emotions...")
         
-        vocal_emotions = predict_emotion(audio_data)
+        hop = default_ser_hop_duration()
+        vocal_emotions = self.stage_cache.get_or_compute(
+            "vocal_emotion", [content_hash, *vocal_emotion_settings()],
+            lambda: predict_emotion(audio_data, hop_duration=hop),
+            cacheable=vocal_emotion_cacheable)
         
-        # Calculate emotion distribution
+        # Calculate emotion distribution (windows without speech aren't an emotion)
         emotion_counts = {}
+        silent_chunks = 0
         for chunk in vocal_emotions:
             emotion = chunk['emotion']
+            if emotion == SILENCE_LABEL:
+                silent_chunks += 1
+                continue
             emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
         
         elapsed = time.time() - start_time
@@ -226,13 +297,13 @@ class DetailedAnalysisPipeline:
         
         if verbose:
             print(f"  ✓ Analyzed {len(vocal_emotions)} audio chunks")
-            print(f"  → Emotion distribution: {emotion_counts}")
+            print(f"  → Emotion distribution: {emotion_counts} ({silent_chunks} chunks without speech)")
             print(f"  ⏱️  Stage 3 completed in {elapsed:.2f}s\n")
         
         return vocal_emotions
     
     def _stage_4_linguistic_analysis(
-        self, transcription: str, vocal_emotions: List[Dict], verbose: bool
+        self, transcription: str, vocal_emotions: List[Dict], transcript_segments: List[Dict], verbose: bool
     ) -> Tuple[Dict, Dict]:
         """Stage 4: Comprehensive linguistic analysis"""
         start_time = time.time()
@@ -242,7 +313,10 @@ class DetailedAnalysisPipeline:
             print("-" * 60)
             print("  → Running spaCy NLP analysis...")
         
-        linguistic_analysis = analyze_transcript_complete(transcription, vocal_emotions)
+        linguistic_analysis = self.stage_cache.get_or_compute(
+            "linguistic_analysis",
+            [hash_value(transcription), hash_value(transcript_segments), hash_value(vocal_emotions)],
+            lambda: analyze_transcript_complete(transcription, vocal_emotions, transcript_segments))
         linguistic_summary = generate_linguistic_summary(linguistic_analysis)
         
         elapsed = time.time() - start_time
@@ -424,7 +498,8 @@ Additional Linguistic Insights:
         system_message = f"""
 You are an expert speech coach. Analyze the emotional delivery and vocal tone.
 Context: "{context}"
-Vocal Emotions: {vocal_emotions}
+Vocal Emotions:
+{format_vocal_emotion_summary(summarize_vocal_emotions(vocal_emotions))}
 {linguistic_context}
         """
         
@@ -437,7 +512,7 @@ Provide a detailed 2-3 paragraph report on emotional delivery. Focus on:
 Do not include numeric scores.
         """
         
-        response = self.gemini_model.generate_content([system_message, user_message])
+        response = gemini_generate_with_retry(self.gemini_model, [system_message, user_message])
         return response.text
     
     def _generate_expression_report(self, facial_emotions: Any) -> str:
@@ -457,7 +532,7 @@ Provide a concise paragraph on facial expression appropriateness:
 Do not include numeric scores.
         """
         
-        response = self.gemini_model.generate_content([system_message, user_message])
+        response = gemini_generate_with_retry(self.gemini_model, [system_message, user_message])
         return response.text
     
     def _generate_scores(
@@ -513,14 +588,16 @@ Provide only JSON: {"vocabulary": X, "voice": Y, "expressions": Z}
         
         user_message = f"""
 Transcription: {transcription}
-Audio Emotions: {vocal_emotions}
+Audio Emotions:
+{format_vocal_emotion_summary(summarize_vocal_emotions(vocal_emotions))}
 Facial Emotions: {emotion_str}
 {linguistic_summary}
 
 Provide only the JSON output.
         """
         
-        response = self.gemini_model.generate_content(
+        response = gemini_generate_with_retry(
+            self.gemini_model,
             [system_message, user_message],
             generation_config=genai.GenerationConfig(
                 response_mime_type="application/json",
@@ -587,7 +664,8 @@ Generate a JSON response with:
 Be specific and actionable. Limit to 3-5 items per category.
         """
         
-        response = self.gemini_model.generate_content(
+        response = gemini_generate_with_retry(
+            self.gemini_model,
             prompt,
             generation_config=genai.GenerationConfig(
                 response_mime_type="application/json",
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 import pymongo
 import re  
 from routes.auth_routes import auth_bp
@@ -8,7 +8,10 @@ import logging
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 import pandas as pd
+import numpy as np
 from bson import ObjectId
+from bson.errors import InvalidDocument
+import hashlib
 import json
 import time
 from datetime import datetime, timedelta, timezone
@@ -16,8 +19,18 @@ import google.generativeai as genai
 
 # Heavy ML utilities are imported lazily inside /upload to keep startup fast.
 # The model_manager handles background pre-loading.
-from model_manager import model_manager
+from model_manager import model_manager, TRANSCRIPTION_TIERS, resolve_tier
 from utils.gemini_rate_limiter import gemini_generate_with_retry
+from utils.job_queue import JobQueue, DONE as JOB_DONE, FAILED as JOB_FAILED
+from utils.stage_executor import StageGraph, StageNode
+from utils.live_transcription import LiveSessionRegistry
+from utils.audio_cache import file_sha256
+from utils.stage_cache import default_stage_cache, hash_value
+from utils.stage_settings import (
+    transcription_settings, vocal_emotion_settings, facial_settings,
+    transcription_cacheable, vocal_emotion_cacheable, facial_cacheable,
+)
+from utils.emotion_summary import summarize_vocal_emotions, format_vocal_emotion_summary
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,10 +48,13 @@ db = client["Eloquence"]
 collections_user = db["user"]
 reports_collection = db["reports"]
 overall_reports_collection = db["overall_reports"]
+# Content hash (+ mode and tier) -> context-independent analysis artifacts
+upload_index_collection = db["upload_index"]
 
 # Gemini client setup
 genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
-gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+GEMINI_MODEL_NAME = "gemini-2.5-flash"
+gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
 # Application Configuration
 UPLOAD_FOLDER = 'Uploads'
@@ -46,6 +62,25 @@ ALLOWED_EXTENSIONS = {'mp4', 'wav', 'mp3', 'm4a', 'webm'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Background analysis queue (SQLite file, no external service needed)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "1"))
+# Finished jobs and their progress events are deleted after this many days
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+job_queue = JobQueue(JOB_DB_PATH, retention_s=JOB_RETENTION_DAYS * 24 * 3600)
+
+# Stages whose results depend only on the recording and transcription tier,
+# not on the session context. A re-upload of the same content reuses them
+# from upload_index and reruns only the context-dependent Gemini reports.
+REUSABLE_STAGES = ("audio_extraction", "facial_analysis", "transcription", "vocal_emotion",
+                   "linguistic_analysis", "scores", "expression_report")
+REUSABLE_VALUES = ("transcription", "transcript_segments", "vocal_emotions", "facial_emotions_timeline",
+                   "linguistic_analysis", "linguistic_summary", "scores", "expression_report")
+
+# Returned by the Gemini stages when the API call fails; never indexed for reuse
+SCORES_FALLBACK = {"vocabulary": 0, "voice": 0, "expressions": 0}
+EXPRESSION_REPORT_FALLBACK = "Unable to generate expression report due to API limitations."
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -88,12 +123,46 @@ def health():
         "status": "ok",
         "mode": "on-demand",
         "whisper_ready": model_manager.is_whisper_ready(),
+        "whisper_models": model_manager.loaded_whisper_models(),
         "ser_ready": model_manager.is_ser_ready(),
         "spacy_ready": model_manager.is_spacy_ready(),
+        "stage_cache": default_stage_cache().stats(),
     })
 
+UPLOAD_STAGES = [
+    "audio_extraction",
+    "facial_analysis",
+    "transcription",
+    "vocal_emotion",
+    "linguistic_analysis",
+    "vocabulary_report",
+    "scores",
+    "speech_report",
+    "expression_report",
+    "persistence",
+]
+
+def _save_upload(file, file_path):
+    """Write an uploaded file to disk block by block, hashing it on the way.
+    Returns the hex SHA-256 of its contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as out:
+        for block in iter(lambda: file.stream.read(1024 * 1024), b""):
+            digest.update(block)
+            out.write(block)
+    return digest.hexdigest()
+
+def _tier_error(tier):
+    """Error response for an unknown transcription tier, or None."""
+    if tier is not None and tier not in TRANSCRIPTION_TIERS:
+        return jsonify({"error": f"Unknown transcription tier '{tier}'",
+                        "tiers": list(TRANSCRIPTION_TIERS)}), 400
+    return None
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    """Save the upload and enqueue it for analysis.
+    Returns a job id right away; poll /jobs/<id> for progress."""
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     file = request.files['file']
@@ -101,10 +170,14 @@ def upload_file():
     context = request.form.get('context', '')
     title = request.form.get('title', 'Untitled Session')
     user_id = request.form.get('userId')
+    tier = request.form.get('tier', '').lower() or None
 
     if not user_id:
         return jsonify({"error": "User ID is required"}), 400
 
+    if _tier_error(tier):
+        return _tier_error(tier)
+
     if file.filename == '' or not allowed_file(file.filename):
         return jsonify({"error": "No selected or allowed file"}), 400
 
@@ -112,77 +185,206 @@ def upload_file():
     # Prefix with timestamp to avoid collisions
     filename = f"{int(time.time())}_{raw_filename}"
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(file_path)
+    content_hash = _save_upload(file, file_path)
+
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    # Determine mode: check form field first, then fall back to extension
+    form_mode = request.form.get('mode', '')
+    if form_mode in ('video', 'audio'):
+        mode = form_mode
+    elif ext == 'mp4' or (ext == 'webm' and form_mode != 'audio'):
+        mode = 'video'
+    else:
+        mode = 'audio'
+
+    job_id = job_queue.enqueue({
+        "file_path": file_path,
+        "filename": filename,
+        "mode": mode,
+        "context": context,
+        "title": title,
+        "userId": user_id,
+        "tier": tier,
+        "contentHash": content_hash,
+    }, stages=UPLOAD_STAGES)
+
+    return jsonify({"jobId": job_id, "status": "queued"}), 202
+
+# ============================================================================
+# Live microphone sessions
+# ============================================================================
+# The client streams raw PCM (mono float32 little-endian, 16 kHz) in chunked
+# POSTs while recording. Whisper runs on each completed window in the
+# background, so when the speaker stops only the last window is left and the
+# analysis job starts with the transcript already done.
+
+live_sessions = LiveSessionRegistry()
+
+@app.route('/live', methods=['POST'])
+def start_live_session():
+    """Open a live transcription session; returns its id."""
+    data = request.get_json(silent=True) or request.form
+    tier = (data.get('tier') or '').lower() or None
+    if _tier_error(tier):
+        return _tier_error(tier)
+    session = live_sessions.create(tier=tier)
+    return jsonify({"sessionId": session.id, "sampleRate": 16000, "format": "f32le"}), 201
+
+@app.route('/live/<session_id>/audio', methods=['POST'])
+def append_live_audio(session_id):
+    """Append a fragment of raw float32 PCM to a live session."""
+    session = live_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Live session not found"}), 404
+    body = request.get_data()
+    if len(body) % 4:
+        return jsonify({"error": "Audio must be float32 PCM"}), 400
+    try:
+        session.add_audio(np.frombuffer(body, dtype='<f4'))
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(session.status())
+
+@app.route('/live/<session_id>', methods=['GET'])
+def get_live_session(session_id):
+    """Rolling transcript and progress of a live session."""
+    session = live_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Live session not found"}), 404
+    return jsonify(session.status())
+
+@app.route('/live/<session_id>', methods=['DELETE'])
+def cancel_live_session(session_id):
+    session = live_sessions.pop(session_id)
+    if session is None:
+        return jsonify({"error": "Live session not found"}), 404
+    session.cancel()
+    return jsonify({"status": "cancelled"})
+
+@app.route('/live/<session_id>/finish', methods=['POST'])
+def finish_live_session(session_id):
+    """Stop a live session and enqueue its analysis like /upload does,
+    reusing the transcript produced while recording."""
+    session = live_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Live session not found"}), 404
+
+    context = request.form.get('context', '')
+    title = request.form.get('title', 'Untitled Session')
+    user_id = request.form.get('userId')
+    if not user_id:
+        return jsonify({"error": "User ID is required"}), 400
 
+    live_sessions.pop(session_id)
     try:
-        # Lazy-import heavy ML utilities only when actually needed
-        from utils.audioextraction import extract_audio_to_memory
-        from utils.expressions import analyze_video_emotions
-        from utils.transcription import speech_to_text_long
-        from utils.vocals import predict_emotion
-        from utils.vocabulary import evaluate_vocabulary
-        from utils.linguistic_analysis import analyze_transcript_complete, generate_linguistic_summary
-
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        # Determine mode: check form field first, then fall back to extension
-        form_mode = request.form.get('mode', '')
-        if form_mode in ('video', 'audio'):
-            mode = form_mode
-        elif ext == 'mp4' or (ext == 'webm' and form_mode != 'audio'):
-            mode = 'video'
-        else:
-            mode = 'audio'
-
-        # In-memory audio processing
-        if mode == "video":
-            audio_data = extract_audio_to_memory(file_path)
-            if audio_data is None:
-                return jsonify({"error": "Failed to extract audio from video"}), 500
-            facial_emotion_analysis, facial_emotions_timeline = analyze_video_emotions(file_path)
-        else:  # Audio mode
-            audio_data = file_path  # Pass the audio file path directly
-            facial_emotion_analysis = pd.DataFrame()
-            facial_emotions_timeline = []
-
-        # Run analysis with updated utility functions
-        transcription = speech_to_text_long(audio_data)
-        vocal_emotion_analysis = predict_emotion(audio_data)
-        
-        # Run detailed linguistic analysis
+        audio, text, segments = session.finish()
+    except Exception as e:
+        logger.exception("Live session %s failed", session_id)
+        return jsonify({"error": f"Live transcription failed: {e}"}), 500
+    if not len(audio):
+        return jsonify({"error": "No audio received"}), 400
+
+    import soundfile as sf
+    filename = f"{int(time.time())}_live_{session_id[:8]}.wav"
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    sf.write(file_path, audio, 16000)
+    content_hash = file_sha256(file_path)
+
+    job_id = job_queue.enqueue({
+        "file_path": file_path,
+        "filename": filename,
+        "mode": "audio",
+        "context": context,
+        "title": title,
+        "userId": user_id,
+        "tier": session.tier,
+        "live_transcript": {"text": text, "segments": segments},
+        "contentHash": content_hash,
+    }, stages=UPLOAD_STAGES)
+
+    return jsonify({"jobId": job_id, "status": "queued"}), 202
+
+# Values passed between stages that are too large or not JSON-friendly to
+# stream to the client as partial results
+_PRIVATE_STAGE_VALUES = {"audio_data", "facial_emotion_analysis", "report_data"}
+
+def build_upload_graph():
+    """Declare the upload pipeline as a graph of stages with explicit inputs
+    and outputs. Independent stages (facial, transcription, vocal emotion and
+    the Gemini reports) run in parallel; the scheduler joins them as needed."""
+    # Lazy-import heavy ML utilities only when actually needed
+    from utils.audioextraction import extract_audio_to_memory
+    from utils.audio_cache import default_audio_cache
+    from utils.expressions import analyze_video_emotions
+    from utils.transcription import speech_to_text_long
+    from utils.vocals import predict_emotion, default_ser_hop_duration
+    from utils.vocabulary import evaluate_vocabulary
+    from utils.linguistic_analysis import analyze_transcript_complete, generate_linguistic_summary
+
+    is_video = lambda values: values["mode"] == "video"
+    stage_cache = default_stage_cache()
+
+    def audio_extraction(file_path, content_hash):
+        # One ffmpeg decode to 16 kHz mono float32 for every input type;
+        # transcription and SER share this buffer. Re-analysing the same
+        # recording maps the cached decode instead of running ffmpeg again
+        audio_data = default_audio_cache().load(file_path, extract_audio_to_memory, key=content_hash)
+        if audio_data is None:
+            raise RuntimeError("Failed to extract audio from upload")
+        return audio_data, round(len(audio_data) / 16000, 2)
+
+    def transcribe(audio_data, tier, live_transcript, content_hash):
+        # Live sessions were transcribed while recording
+        if live_transcript is not None:
+            return live_transcript["text"], live_transcript["segments"]
+        result = stage_cache.get_or_compute(
+            "transcription", [content_hash, *transcription_settings(tier)],
+            lambda: speech_to_text_long(audio_data, return_segments=True, tier=tier),
+            cacheable=transcription_cacheable)
+        return result["text"], result["segments"]
+
+    def vocal_emotion(audio_data, content_hash):
+        hop = default_ser_hop_duration()
+        return stage_cache.get_or_compute(
+            "vocal_emotion", [content_hash, *vocal_emotion_settings()],
+            lambda: predict_emotion(audio_data, hop_duration=hop),
+            cacheable=vocal_emotion_cacheable)
+
+    def facial_analysis(file_path, mode, content_hash):
+        return stage_cache.get_or_compute(
+            "facial_analysis", [content_hash, *facial_settings()], lambda: analyze_video_emotions(file_path),
+            cacheable=facial_cacheable)
+
+    def linguistic(transcription, vocal_emotions, transcript_segments):
         print("Running linguistic analysis...")
-        linguistic_analysis = analyze_transcript_complete(transcription, vocal_emotion_analysis)
-        linguistic_summary = generate_linguistic_summary(linguistic_analysis)
-        
-        # Generate vocabulary report with linguistic insights
-        vocabulary_report = evaluate_vocabulary(transcription, context, linguistic_analysis)
-        
-        # Convert DataFrame to string for LLM processing
-        emotion_analysis_str = facial_emotion_analysis.to_string(index=False) if not facial_emotion_analysis.empty else "No facial data"
+        analysis = stage_cache.get_or_compute(
+            "linguistic_analysis",
+            [hash_value(transcription), hash_value(transcript_segments), hash_value(vocal_emotions)],
+            lambda: analyze_transcript_complete(transcription, vocal_emotions, transcript_segments))
+        return analysis, generate_linguistic_summary(analysis)
 
-        # Generate reports (rate limiter enforces proper spacing between Gemini calls)
-        print("Generating scores...")
-        scores = generate_scores(transcription, vocal_emotion_analysis, emotion_analysis_str, linguistic_analysis)
-        
-        print("Generating speech report...")
-        speech_report = generate_speech_report(transcription, context, vocal_emotion_analysis, linguistic_analysis)
-        
-        print("Generating expression report...")
-        expression_report = generate_expression_report(emotion_analysis_str) if mode == "video" else "No expression analysis for audio-only mode."
+    def facial_str(facial_emotion_analysis):
+        # Convert DataFrame to string for LLM processing
+        if facial_emotion_analysis is None or facial_emotion_analysis.empty:
+            return "No facial data"
+        return facial_emotion_analysis.to_string(index=False)
 
-        # Prepare and save report
-        from datetime import datetime
+    def persistence(user_id, title, context, filename, transcription, transcript_segments, vocabulary_report,
+                    speech_report, expression_report, scores, linguistic_analysis,
+                    linguistic_summary, vocal_emotions, facial_emotions_timeline):
         report_data = {
             "userId": user_id,
             "title": title,
             "context": context,
             "transcription": transcription,
+            "transcript_segments": transcript_segments,
             "vocabulary_report": vocabulary_report,
             "speech_report": speech_report,
             "expression_report": expression_report,
             "scores": scores,
             "linguistic_analysis": linguistic_analysis,
             "linguistic_summary": linguistic_summary,
-            "vocal_emotions": vocal_emotion_analysis,
+            "vocal_emotions": vocal_emotions,
             "facial_emotions_timeline": facial_emotions_timeline,
             "uploaded_filename": filename,
             "createdAt": datetime.utcnow()
@@ -190,20 +392,240 @@ def upload_file():
         result = reports_collection.insert_one(report_data.copy())
         report_data["_id"] = str(result.inserted_id)
         update_overall_reports(user_id)
-        report_data = convert_objectid_to_string(report_data)
+        return convert_objectid_to_string(report_data), report_data["_id"]
+
+    # Gemini stages are serialized by the rate limiter, but declaring them
+    # independent lets them start as soon as their own inputs are ready
+    return StageGraph([
+        StageNode("audio_extraction", audio_extraction,
+                  inputs=["file_path", "content_hash"], outputs=["audio_data", "duration_s"]),
+        StageNode("facial_analysis", facial_analysis,
+                  inputs=["file_path", "mode", "content_hash"],
+                  outputs=["facial_emotion_analysis", "facial_emotions_timeline"],
+                  applies=is_video,
+                  on_skip=lambda v: (pd.DataFrame(), [])),
+        StageNode("transcription", transcribe,
+                  inputs=["audio_data", "tier", "live_transcript", "content_hash"],
+                  outputs=["transcription", "transcript_segments"]),
+        StageNode("vocal_emotion", vocal_emotion,
+                  inputs=["audio_data", "content_hash"], outputs=["vocal_emotions"]),
+        StageNode("linguistic_analysis", linguistic,
+                  inputs=["transcription", "vocal_emotions", "transcript_segments"],
+                  outputs=["linguistic_analysis", "linguistic_summary"]),
+        # Generate vocabulary report with linguistic insights
+        StageNode("vocabulary_report", evaluate_vocabulary,
+                  inputs=["transcription", "context", "linguistic_analysis"],
+                  outputs=["vocabulary_report"]),
+        StageNode("scores",
+                  lambda transcription, vocal_emotions, facial_emotion_analysis, linguistic_analysis:
+                      generate_scores(transcription, vocal_emotions,
+                                      facial_str(facial_emotion_analysis), linguistic_analysis),
+                  inputs=["transcription", "vocal_emotions", "facial_emotion_analysis", "linguistic_analysis"],
+                  outputs=["scores"]),
+        StageNode("speech_report",
+                  lambda transcription, context, vocal_emotions, linguistic_analysis:
+                      generate_speech_report(transcription, context, vocal_emotions, linguistic_analysis),
+                  inputs=["transcription", "context", "vocal_emotions", "linguistic_analysis"],
+                  outputs=["speech_report"]),
+        StageNode("expression_report",
+                  lambda facial_emotion_analysis, mode: generate_expression_report(facial_str(facial_emotion_analysis)),
+                  inputs=["facial_emotion_analysis", "mode"], outputs=["expression_report"],
+                  applies=is_video,
+                  on_skip=lambda v: "No expression analysis for audio-only mode."),
+        StageNode("persistence", persistence,
+                  inputs=["user_id", "title", "context", "filename", "transcription",
+                          "transcript_segments", "vocabulary_report", "speech_report", "expression_report", "scores",
+                          "linguistic_analysis", "linguistic_summary", "vocal_emotions",
+                          "facial_emotions_timeline"],
+                  outputs=["report_data", "reportId"]),
+    ])
+
+def _track_stage(job_id, node):
+    """Wrap a stage so the job queue records its status, timing and partial result."""
+    def run(**inputs):
+        with job_queue.stage(job_id, node.name) as stage:
+            result = node.fn(**inputs)
+            stage["partial"] = {
+                k: v for k, v in node.unpack(result).items() if k not in _PRIVATE_STAGE_VALUES
+            }
+        return result
+    return StageNode(node.name, run, node.inputs, node.outputs, node.applies, node.on_skip)
+
+def _upload_index_key(payload):
+    """Index key for an upload: identical content analysed in the same mode
+    with the same stage versions, models and decoding/SER settings (the
+    components the stage cache keys on) yields the same context-independent
+    results. Changing any of them makes older index entries unreachable."""
+    if not payload.get("contentHash"):
+        return None
+    live = payload.get("live_transcript") is not None
+    return hash_value([
+        payload["contentHash"],
+        payload["mode"],
+        default_stage_cache().versions,
+        "live" if live else transcription_settings(resolve_tier(payload.get("tier"))),
+        vocal_emotion_settings(),
+        facial_settings() if payload["mode"] == "video" else None,
+        GEMINI_MODEL_NAME,
+    ])
+
+def _find_indexed_upload(index_key):
+    if index_key is None:
+        return None
+    try:
+        return upload_index_collection.find_one({"_id": index_key})
+    except pymongo.errors.PyMongoError:
+        logger.exception("Upload index lookup failed; running the full pipeline")
+        return None
+
+def _is_reusable(values, mode):
+    """Whether a finished run's reusable values are real results. Failed
+    stages return placeholders (zero scores, a canned expression report,
+    an empty transcript, a neutral vocal chunk, no facial scores); indexing
+    those would replay the failure for every later duplicate upload."""
+    return (
+        values["scores"] != SCORES_FALLBACK
+        and values["expression_report"] != EXPRESSION_REPORT_FALLBACK
+        and transcription_cacheable({"text": values["transcription"]})
+        and vocal_emotion_cacheable(values["vocal_emotions"])
+        and (mode != "video" or facial_cacheable(
+            (values["facial_emotion_analysis"], values["facial_emotions_timeline"])))
+    )
+
+def _index_upload(index_key, values):
+    try:
+        upload_index_collection.update_one(
+            {"_id": index_key},
+            {"$set": {
+                "artifacts": {name: values[name] for name in REUSABLE_VALUES},
+                "filename": values["filename"],
+                "updatedAt": datetime.utcnow(),
+            }},
+            upsert=True,
+        )
+    except (pymongo.errors.PyMongoError, InvalidDocument):
+        logger.exception("Could not index upload %s", index_key)
+
+def run_analysis_job(job):
+    """Worker entry point: run the full analysis pipeline for one queued upload."""
+    job_id = job["id"]
+    payload = job["payload"]
+    file_path = payload["file_path"]
+
+    try:
+        initial = {
+            "file_path": file_path,
+            "filename": payload["filename"],
+            "mode": payload["mode"],
+            "context": payload["context"],
+            "title": payload["title"],
+            "user_id": payload["userId"],
+            "tier": payload.get("tier"),
+            "live_transcript": payload.get("live_transcript"),
+            "content_hash": payload.get("contentHash"),
+        }
+        nodes = build_upload_graph().nodes
+
+        # Same recording analysed before: skip straight to the reports
+        # that depend on this session's context
+        index_key = _upload_index_key(payload)
+        indexed = _find_indexed_upload(index_key)
+        if indexed:
+            print(f"Reusing analysis of identical upload {indexed.get('filename')}")
+            initial.update({name: indexed["artifacts"][name] for name in REUSABLE_VALUES})
+            for name in REUSABLE_STAGES:
+                job_queue.reuse_stage(job_id, name)
+            nodes = [node for node in nodes if node.name not in REUSABLE_STAGES]
+
+        graph = StageGraph([_track_stage(job_id, node) for node in nodes])
+        values, timings, (path, path_time) = graph.run(
+            initial,
+            on_skip=lambda name: job_queue.skip_stage(job_id, name),
+        )
+        print(f"Analysis finished; critical path {' -> '.join(path)} ({path_time:.1f}s)")
+
+        job_queue.complete(job_id, values["report_data"])
+
+        if index_key and not indexed:
+            if _is_reusable(values, payload["mode"]):
+                _index_upload(index_key, values)
+            else:
+                print("Not indexing upload: a stage returned its failure placeholder")
 
         # After first upload, pre-warm remaining ML models in background
         # so subsequent uploads are faster
         model_manager.prewarm_remaining()
 
-        return jsonify(report_data), 200
-
     except Exception as e:
         print(f"An error occurred during processing: {e}")
         # Cleanup on failure only
         if os.path.exists(file_path):
             os.remove(file_path)
-        return jsonify({"error": "An internal server error occurred during analysis"}), 500
+        job_queue.fail(job_id, "An internal server error occurred during analysis")
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Report job status and per-stage progress for an upload."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({
+        "jobId": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "stages": job["stages"],
+        "error": job["error"],
+        "reportId": job["result"]["_id"] if job["result"] else None,
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"],
+    }), 200
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Return the finished report, or 202 while the job is still running."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    if job["status"] == JOB_DONE:
+        return jsonify(job["result"]), 200
+    if job["status"] == JOB_FAILED:
+        return jsonify({"error": job["error"]}), 500
+    return jsonify({"jobId": job["id"], "status": job["status"], "progress": job["progress"]}), 202
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Server-Sent Events stream: one ``stage`` event per finished stage
+    (timings + partial results), then a final ``done`` or ``failed`` event.
+    Reconnecting clients resume from the Last-Event-ID header."""
+    if not job_queue.get(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or 0
+    try:
+        cursor = int(last_event_id)
+    except ValueError:
+        cursor = 0
+
+    def generate():
+        nonlocal cursor
+        while True:
+            events = job_queue.events_since(job_id, cursor)
+            for event in events:
+                cursor = event["seq"]
+                yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+                if event["event"] in ("done", "failed"):
+                    return
+            if not events and not job_queue.wait_for_events(timeout=15):
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 def update_overall_reports(user_id):
     """
@@ -596,7 +1018,8 @@ Linguistic Metrics:
     user_message = f"""
     Transcription: {transcription}
 
-    Audio Emotion Data: {audio_emotion}
+    Audio Emotion Data:
+    {format_vocal_emotion_summary(summarize_vocal_emotions(audio_emotion))}
 
     Facial Emotion Analysis: {emotion_analysis}
     
@@ -628,7 +1051,7 @@ Linguistic Metrics:
         return scores
     except Exception as e:
         print(f"Error generating scores: {e}")
-        return {"vocabulary": 0, "voice": 0, "expressions": 0}
+        return dict(SCORES_FALLBACK)
 
 def generate_speech_report(transcription, context, audio_emotion, linguistic_data=None):
     """
@@ -651,7 +1074,7 @@ def generate_speech_report(transcription, context, audio_emotion, linguistic_dat
     system_message = f"""
     You are an expert in emotional and contextual analysis of speeches. Based on the context: "{context}", 
     evaluate if the emotions expressed in the audio match the intended purpose. Consider the following emotion data:
-    {audio_emotion}.
+    {format_vocal_emotion_summary(summarize_vocal_emotions(audio_emotion))}
     {linguistic_context}
     """
     user_message = """
@@ -691,7 +1114,13 @@ def generate_expression_report(emotion_analysis_str):
         return response.text
     except Exception as e:
         print(f"Error generating expression report: {e}")
-        return "Unable to generate expression report due to API limitations."
+        return EXPRESSION_REPORT_FALLBACK
+
+# Start analysis workers once the pipeline functions above are defined.
+# Spawned worker processes (facial analysis pool) re-import this module as
+# __mp_main__ and must not start queue workers of their own
+if __name__ != '__mp_main__':
+    job_queue.start_workers(run_analysis_job, num_workers=ANALYSIS_WORKERS)
 
 if __name__ == '__main__':
     if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug:
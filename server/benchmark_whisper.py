@@ -0,0 +1,109 @@
+"""
+Compare float32 and dynamic int8 Whisper on a local recording.
+
+For every tier/precision combination this loads the model, transcribes the
+fixture, and reports word error rate against a reference transcript together
+with load time, decode latency and the resident memory the model added.
+
+Usage:
+    python benchmark_whisper.py --audio fixture.wav --reference fixture.txt
+    python benchmark_whisper.py --audio fixture.wav --reference fixture.txt --tiers fast accurate
+    python benchmark_whisper.py --audio fixture.wav --reference fixture.txt --assisted
+"""
+
+import argparse
+import gc
+import os
+import re
+import time
+
+import librosa
+
+from model_manager import model_manager, TRANSCRIPTION_TIERS
+from utils.transcription import speech_to_text_long
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # Peak rather than current RSS on platforms without /proc
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def normalize_words(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Levenshtein distance over words divided by the reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def benchmark(audio, reference, tier, quantized, assisted=False):
+    # transcription picks the precision up from WHISPER_QUANTIZE
+    os.environ["WHISPER_QUANTIZE"] = "int8" if quantized else "0"
+    gc.collect()
+    rss_before = resident_memory_mb()
+    started = time.time()
+    model_manager.get_whisper(TRANSCRIPTION_TIERS[tier]["model"])
+    load_s = time.time() - started
+    rss_model = resident_memory_mb() - rss_before
+
+    started = time.time()
+    text = speech_to_text_long(audio, tier=tier, assisted=assisted)
+    decode_s = time.time() - started
+
+    return {
+        "tier": tier,
+        "precision": ("int8" if quantized else "float32") + ("+draft" if assisted else ""),
+        "wer": word_error_rate(reference, text),
+        "load_s": load_s,
+        "decode_s": decode_s,
+        "rtf": decode_s / (len(audio) / 16000),
+        "model_rss_mb": rss_model,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True, help="Recording to transcribe")
+    parser.add_argument("--reference", required=True, help="Text file with the reference transcript")
+    parser.add_argument("--tiers", nargs="+", default=list(TRANSCRIPTION_TIERS),
+                        choices=list(TRANSCRIPTION_TIERS))
+    parser.add_argument("--assisted", action="store_true",
+                        help="Also time assisted decoding with the draft model")
+    args = parser.parse_args()
+
+    audio, _ = librosa.load(args.audio, sr=16000)
+    with open(args.reference, encoding="utf-8") as f:
+        reference = f.read()
+
+    rows = [benchmark(audio, reference, tier, quantized)
+            for tier in args.tiers for quantized in (False, True)]
+    if args.assisted:
+        rows += [benchmark(audio, reference, tier, quantized=False, assisted=True) for tier in args.tiers]
+
+    print(f"\n{'tier':<10}{'precision':<15}{'WER':>7}{'load s':>9}{'decode s':>10}{'RTF':>7}{'model MB':>10}")
+    for row in rows:
+        print(f"{row['tier']:<10}{row['precision']:<15}{row['wer']:>7.3f}{row['load_s']:>9.1f}"
+              f"{row['decode_s']:>10.1f}{row['rtf']:>7.2f}{row['model_rss_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,20 +10,50 @@ No models are loaded at startup. The server starts instantly and serves all
 non-ML endpoints (auth, reports, chat, health) without any delay.
 """
 
+import os
 import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Transcription quality tiers: Whisper checkpoint and beam width. Smaller
+# models with greedy decoding finish practice sessions in seconds on a CPU
+# host; "accurate" keeps the original whisper-medium beam search.
+TRANSCRIPTION_TIERS = {
+    "fast": {"model": "openai/whisper-base", "num_beams": 1},
+    "balanced": {"model": "openai/whisper-small", "num_beams": 2},
+    "accurate": {"model": "openai/whisper-medium", "num_beams": 5},
+}
+
+def resolve_tier(tier=None):
+    """Return a valid tier name (default: TRANSCRIPTION_TIER or "accurate")."""
+    tier = (tier or os.getenv("TRANSCRIPTION_TIER") or "accurate").lower()
+    if tier not in TRANSCRIPTION_TIERS:
+        raise ValueError(f"Unknown transcription tier '{tier}'; "
+                         f"expected one of {', '.join(TRANSCRIPTION_TIERS)}")
+    return tier
+
+# Checkpoint used by pre-warming and when no tier is given
+DEFAULT_WHISPER_MODEL = TRANSCRIPTION_TIERS["accurate"]["model"]
+
+
+# Small checkpoint that drafts tokens for assisted (speculative) decoding; it
+# shares Whisper's multilingual tokenizer with the tier models
+DRAFT_WHISPER_MODEL = "openai/whisper-tiny"
+
+
+def whisper_quantization_enabled():
+    """CPU int8 Whisper is opt-in: WHISPER_QUANTIZE=int8 (or 1/true)."""
+    return os.getenv("WHISPER_QUANTIZE", "").lower() in ("int8", "1", "true", "yes")
+
 
 class ModelManager:
     """Thread-safe on-demand model loader. Models are loaded only when a user
     request actually needs them, keeping startup instant."""
 
     def __init__(self):
-        self._whisper_processor = None
-        self._whisper_model = None
-        self._whisper_device = None
+        # Whisper variants keyed by (checkpoint name, quantized) -> (processor, model, device)
+        self._whisper_variants = {}
         self._emotion_recognizer = None
         self._spacy_nlp = None
 
@@ -43,11 +73,22 @@ class ModelManager:
     #  Public read-only access (blocks only if model isn't loaded yet)    #
     # ------------------------------------------------------------------ #
 
-    def get_whisper(self):
-        """Returns (processor, model, device) tuple. Loads on first call."""
-        if not self._whisper_ready.is_set():
-            self._init_whisper()
-        return self._whisper_processor, self._whisper_model, self._whisper_device
+    def get_whisper(self, model_name=DEFAULT_WHISPER_MODEL, quantized=None):
+        """Returns (processor, model, device) tuple for the given Whisper
+        checkpoint. Each checkpoint is loaded on its first call and kept.
+
+        quantized selects the dynamic int8 CPU variant (default:
+        WHISPER_QUANTIZE); it is ignored when CUDA is available."""
+        if quantized is None:
+            quantized = whisper_quantization_enabled()
+        variant = self._whisper_variants.get((model_name, bool(quantized)))
+        if variant is None:
+            variant = self._init_whisper(model_name, bool(quantized))
+        return variant
+
+    def get_whisper_draft(self, quantized=None):
+        """Returns the draft model used for assisted decoding. Loads on first call."""
+        return self.get_whisper(DRAFT_WHISPER_MODEL, quantized)[1]
 
     def get_emotion_recognizer(self):
         """Returns SER model. Loads on first call."""
@@ -65,6 +106,10 @@ class ModelManager:
     def is_whisper_ready(self):
         return self._whisper_ready.is_set()
 
+    def loaded_whisper_models(self):
+        return sorted(f"{name}{' (int8)' if quantized else ''}"
+                      for name, quantized in self._whisper_variants)
+
     def is_ser_ready(self):
         return self._ser_ready.is_set()
 
@@ -75,24 +120,36 @@ class ModelManager:
     #  Init helpers (thread-safe, idempotent)                             #
     # ------------------------------------------------------------------ #
 
-    def _init_whisper(self):
+    def _init_whisper(self, model_name=DEFAULT_WHISPER_MODEL, quantized=False):
+        key = (model_name, quantized)
         with self._whisper_lock:
-            if self._whisper_ready.is_set():
-                return
-            logger.info("Loading Whisper transcription model (on-demand) …")
+            if key in self._whisper_variants:
+                return self._whisper_variants[key]
+            logger.info("Loading Whisper transcription model %s (on-demand) …", model_name)
             import torch
             from transformers import WhisperProcessor, WhisperForConditionalGeneration
 
-            model_name = "openai/whisper-medium"
-            self._whisper_processor = WhisperProcessor.from_pretrained(model_name)
-            self._whisper_model = WhisperForConditionalGeneration.from_pretrained(
+            use_cuda = torch.cuda.is_available()
+            processor = WhisperProcessor.from_pretrained(model_name)
+            model = WhisperForConditionalGeneration.from_pretrained(
                 model_name,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+                torch_dtype=torch.float16 if use_cuda else torch.float32,
             )
-            self._whisper_device = "cuda:0" if torch.cuda.is_available() else "cpu"
-            self._whisper_model.to(self._whisper_device)
+            device = "cuda:0" if use_cuda else "cpu"
+            model.to(device)
+            if quantized and not use_cuda:
+                # int8 weights for every nn.Linear; activations are quantized
+                # on the fly, so no calibration data is needed
+                model = torch.ao.quantization.quantize_dynamic(
+                    model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+                )
+            elif quantized:
+                logger.info("WHISPER_QUANTIZE ignored: CUDA is available")
+            self._whisper_variants[key] = (processor, model, device)
             self._whisper_ready.set()
-            logger.info("Whisper model ready on %s", self._whisper_device)
+            logger.info("Whisper model %s ready on %s%s", model_name, device,
+                        " (int8)" if quantized and not use_cuda else "")
+            return self._whisper_variants[key]
 
     def _init_ser(self):
         with self._ser_lock:
@@ -150,7 +207,8 @@ class ModelManager:
         def _warm():
             for name, loader in [
                 ("spaCy", self._init_spacy),
-                ("Whisper", self._init_whisper),
+                # The server's default tier, honouring WHISPER_QUANTIZE
+                ("Whisper", lambda: self.get_whisper(TRANSCRIPTION_TIERS[resolve_tier()]["model"])),
                 ("SER", self._init_ser),
             ]:
                 try:
@@ -0,0 +1,75 @@
+"""
+Checks that facial analysis over parallel time ranges samples exactly the
+frames a serial pass does (utils/expressions.py).
+
+Each synthetic frame encodes its own index in its pixel values, so the
+sampled frames can be compared across range boundaries. Run with
+``python -m pytest test_facial_ranges.py`` or ``python test_facial_ranges.py``.
+"""
+
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from utils.expressions import _plan_ranges, iter_sampled_frames
+
+FPS = 30
+WIDTH, HEIGHT = 192, 120
+STRIPE = WIDTH // 3
+
+
+def _write_video(path, num_frames, fourcc):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), FPS, (WIDTH, HEIGHT))
+    for i in range(num_frames):
+        frame = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        # One base-16 digit per vertical stripe, centred in its level so
+        # compression noise doesn't change the decoded index
+        for stripe, digit in enumerate((i // 256, i // 16 % 16, i % 16)):
+            frame[:, stripe * STRIPE:(stripe + 1) * STRIPE] = digit * 16 + 8
+        writer.write(frame)
+    writer.release()
+
+
+def _frame_index(frame):
+    index = 0
+    for stripe in range(3):
+        # Sample the middle of the stripe, away from blurred edges
+        level = frame[:, stripe * STRIPE + STRIPE // 4:(stripe + 1) * STRIPE - STRIPE // 4].mean()
+        index = index * 16 + int(level // 16)
+    return index
+
+
+def _sampled(path, start_frame=0, end_frame=None):
+    return [
+        (round(t, 6), _frame_index(frame))
+        for t, frame in iter_sampled_frames(path, 1, "grab", start_frame, end_frame)
+    ]
+
+
+def _check_ranges_match_serial(fourcc):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"ranges_{fourcc}.avi")
+        # Long enough for several 30 s ranges
+        _write_video(path, FPS * 130, fourcc)
+
+        serial = _sampled(path)
+        ranges = _plan_ranges(path, 1, workers=4)
+        assert len(ranges) > 1
+        parallel = [sample for start, end in ranges for sample in _sampled(path, start, end)]
+
+        assert parallel == serial
+        assert [index for _, index in serial] == list(range(0, FPS * 130, FPS))
+
+
+def test_ranges_match_serial_pass():
+    # MJPG is intra-only; XVID/mp4v use inter-frame prediction, so seeks
+    # land on keyframes and have to be corrected
+    _check_ranges_match_serial("MJPG")
+    _check_ranges_match_serial("XVID")
+
+
+if __name__ == "__main__":
+    test_ranges_match_serial_pass()
+    print("Range sampling matches the serial pass")
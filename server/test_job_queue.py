@@ -0,0 +1,74 @@
+"""
+Checks for the SQLite job queue in utils/job_queue.py when several server
+processes share one database file.
+
+Run with ``python -m pytest test_job_queue.py`` or ``python test_job_queue.py``.
+"""
+
+import os
+import tempfile
+import time
+
+from utils.job_queue import JobQueue, QUEUED, RUNNING, DONE
+
+
+def _queues(stale_after=120.0, retention_s=3600.0):
+    path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    # Two queues on one file stand in for two server processes
+    return (JobQueue(path, stale_after=stale_after, retention_s=retention_s),
+            JobQueue(path, stale_after=stale_after, retention_s=retention_s))
+
+
+def test_live_claims_are_not_requeued():
+    first, second = _queues()
+    job_id = first.enqueue({"n": 1})
+    assert first.claim_next()["id"] == job_id
+    first.heartbeat()
+
+    # Another process starting up must leave the in-flight job alone
+    assert second.requeue_stale() == 0
+    assert second.get(job_id)["status"] == RUNNING
+    assert second.claim_next() is None
+
+
+def test_stale_claims_are_requeued():
+    first, second = _queues(stale_after=0.05)
+    job_id = first.enqueue({"n": 1})
+    first.claim_next()
+    time.sleep(0.1)  # the first process stopped sending heartbeats
+
+    assert second.requeue_stale() == 1
+    assert second.get(job_id)["status"] == QUEUED
+    assert second.claim_next()["id"] == job_id
+
+
+def test_finished_jobs_are_pruned_with_their_events():
+    queue, _ = _queues(retention_s=0.05)
+    old_id = queue.enqueue({"n": 1})
+    queue.claim_next()
+    queue.complete(old_id, {"_id": "report"})
+    pending_id = queue.enqueue({"n": 2})
+    time.sleep(0.1)
+
+    assert queue.prune() == 1
+    assert queue.get(old_id) is None
+    assert queue.events_since(old_id) == []
+    assert queue.get(pending_id)["status"] == QUEUED
+
+
+def test_finished_jobs_within_retention_are_kept():
+    queue, _ = _queues()
+    job_id = queue.enqueue({"n": 1})
+    queue.claim_next()
+    queue.complete(job_id, {"_id": "report"})
+
+    assert queue.prune() == 0
+    assert queue.get(job_id)["status"] == DONE
+
+
+if __name__ == "__main__":
+    test_live_claims_are_not_requeued()
+    test_stale_claims_are_requeued()
+    test_finished_jobs_are_pruned_with_their_events()
+    test_finished_jobs_within_retention_are_kept()
+    print("Job queue checks passed")
@@ -0,0 +1,70 @@
+"""
+Checks for the energy VAD in utils/transcription.py on synthetic speech
+with real background noise.
+
+Run with ``python -m pytest test_vad.py`` or ``python test_vad.py``.
+"""
+
+import numpy as np
+
+from utils.transcription import detect_speech_regions
+
+SAMPLE_RATE = 16000
+
+
+def _db_to_amplitude(level_db):
+    return 10.0 ** (level_db / 20.0)
+
+
+def _synthetic_talk(noise_db, duration_s=100, speech_s=3.0, pause_s=1.0, speech_db=-20.0, seed=0):
+    """Voiced bursts (harmonics of a gliding pitch, syllable-rate envelope)
+    separated by pauses, over white noise at ``noise_db`` RMS."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration_s * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t) ** 2
+    voiced *= envelope / np.sqrt(np.mean(voiced ** 2)) * _db_to_amplitude(speech_db)
+
+    in_speech = (t % (speech_s + pause_s)) < speech_s
+    noise = rng.standard_normal(len(t)) * _db_to_amplitude(noise_db)
+    audio = (voiced * in_speech + noise).astype(np.float32)
+    pauses = [
+        (start + speech_s, start + speech_s + pause_s)
+        for start in np.arange(0, duration_s - speech_s - pause_s, speech_s + pause_s)
+    ]
+    return audio, pauses
+
+
+def _check_pauses_dropped(noise_db):
+    audio, pauses = _synthetic_talk(noise_db)
+    regions = detect_speech_regions(audio, SAMPLE_RATE)
+    kept_s = sum(end - start for start, end in regions) / SAMPLE_RATE
+
+    assert len(regions) > 1, f"noise at {noise_db} dB: everything kept as one region"
+    assert kept_s < 0.85 * len(audio) / SAMPLE_RATE, f"noise at {noise_db} dB: kept {kept_s:.0f}s"
+    # The middle of every pause is silence
+    for pause_start, pause_end in pauses:
+        middle = int((pause_start + pause_end) / 2 * SAMPLE_RATE)
+        assert not any(start <= middle < end for start, end in regions), \
+            f"noise at {noise_db} dB: pause at {pause_start:.0f}s kept as speech"
+    # ...and the speech itself is kept
+    assert kept_s > 0.7 * 0.75 * len(audio) / SAMPLE_RATE
+
+
+def test_pauses_dropped_with_background_noise():
+    for noise_db in (-70.0, -50.0, -45.0, -40.0):
+        _check_pauses_dropped(noise_db)
+
+
+def test_continuous_speech_is_not_split():
+    audio, _ = _synthetic_talk(-60.0, duration_s=20, speech_s=20.0, pause_s=0.0)
+    regions = detect_speech_regions(audio, SAMPLE_RATE)
+    assert len(regions) == 1
+
+
+if __name__ == "__main__":
+    test_pauses_dropped_with_background_noise()
+    test_continuous_speech_is_not_split()
+    print("VAD checks passed")
@@ -35,6 +35,9 @@ class CustomEncoderWav2vec2Classifier(Pretrained):
     >>> prediction =  classifier .classify_batch(signal)
     """
 
+    # wav2vec2 emits one frame per 320 input samples (20 ms at 16 kHz)
+    FRAME_STRIDE = 320
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -85,6 +88,132 @@ class CustomEncoderWav2vec2Classifier(Pretrained):
         outputs = outputs.view(outputs.shape[0], -1)
         return outputs
 
+    def encode_frames(self, wavs):
+        """Runs only the wav2vec2 encoder and returns frame-level features.
+
+        Arguments
+        ---------
+        wavs : torch.tensor
+            Batch of waveforms [batch, time] or a single waveform [time],
+            sampled at 16000 Hz.
+
+        Returns
+        -------
+        torch.tensor
+            Features of shape [batch, frames, encoder_dim], one frame per
+            FRAME_STRIDE input samples.
+        """
+        if len(wavs.shape) == 1:
+            wavs = wavs.unsqueeze(0)
+        wavs = wavs.to(self.device).float()
+        return self.mods.wav2vec2(wavs)
+
+    def pool_frames(self, frames, ranges):
+        """Mean-pools ranges of frame-level features into embeddings.
+
+        A cumulative sum over the frames makes every range cost the same
+        regardless of its length, so heavily overlapping windows share the
+        work of a single encoder pass.
+
+        Arguments
+        ---------
+        frames : torch.tensor
+            Features of one recording, [frames, encoder_dim].
+        ranges : list
+            (first, last) frame indices per window, last exclusive.
+
+        Returns
+        -------
+        torch.tensor
+            Embeddings of shape [len(ranges), encoder_dim].
+        """
+        frames = frames.to(self.device)
+        cumsum = torch.cat([
+            torch.zeros(1, frames.shape[-1], dtype=torch.float64, device=frames.device),
+            frames.double().cumsum(dim=0),
+        ])
+        bounds = torch.tensor(ranges, dtype=torch.long, device=frames.device).reshape(-1, 2)
+        first = bounds[:, 0].clamp(0, frames.shape[0] - 1)
+        last = torch.maximum(bounds[:, 1].clamp(max=frames.shape[0]), first + 1)
+        pooled = (cumsum[last] - cumsum[first]) / (last - first).unsqueeze(1)
+        return pooled.float()
+
+    def encode_recording(self, wav, segment_samples=480000, context_samples=16000,
+                         dtype=torch.float16):
+        """Computes frame-level features for a whole recording in
+        bounded-memory segments.
+
+        Each segment is encoded together with ``context_samples`` of audio
+        on both sides, and only the frames of its own span are kept, so the
+        concatenated features are close to a single pass over the
+        recording, while memory stays bounded by one segment.
+
+        Arguments
+        ---------
+        wav : torch.tensor
+            One waveform [time] at 16000 Hz.
+        segment_samples : int
+            Samples encoded per forward pass (besides the context).
+        context_samples : int
+            Extra audio on each side of a segment.
+        dtype : torch.dtype
+            Storage type of the returned features (float16 halves memory).
+
+        Returns
+        -------
+        torch.tensor
+            Features [frames, encoder_dim] on the CPU, one frame per
+            FRAME_STRIDE samples; pool them with pool_frames().
+        """
+        segment_samples = max(segment_samples // self.FRAME_STRIDE, 1) * self.FRAME_STRIDE
+        num_samples = wav.shape[-1]
+        parts = []
+        for start in range(0, num_samples, segment_samples):
+            end = min(start + segment_samples, num_samples)
+            lo = max(start - context_samples, 0)
+            hi = min(end + context_samples, num_samples)
+            frames = self.encode_frames(wav[lo:hi])[0]
+            first = (start - lo) // self.FRAME_STRIDE
+            last = frames.shape[0] if end == num_samples else first + (end - start) // self.FRAME_STRIDE
+            parts.append(frames[first:last].to("cpu", dtype))
+        if not parts:
+            return torch.zeros(0, self.hparams.encoder_dim, dtype=dtype)
+        return torch.cat(parts)
+
+    def classify_frames(self, frames, windows):
+        """Classifies windows of a recording from its frame-level features
+        (see encode_recording()) without running the encoder again.
+
+        Arguments
+        ---------
+        frames : torch.tensor
+            Features of one recording, [frames, encoder_dim].
+        windows : list
+            (start_sample, end_sample) per window.
+
+        Returns
+        -------
+        The same (out_prob, score, index, text_lab) tuple as
+        classify_batch().
+        """
+        ranges = [
+            (start // self.FRAME_STRIDE, -(-end // self.FRAME_STRIDE))
+            for start, end in windows
+        ]
+        return self.classify_embeddings(self.pool_frames(frames, ranges))
+
+    def classify_embeddings(self, embeddings):
+        """Applies the classifier head to pooled embeddings.
+
+        Returns the same (out_prob, score, index, text_lab) tuple as
+        classify_batch().
+        """
+        outputs = self.mods.output_mlp(embeddings)
+        out_prob = self.hparams.softmax(outputs)
+        score, index = torch.max(out_prob, dim=-1)
+        text_lab = self.hparams.label_encoder.decode_torch(index)
+        return out_prob, score, index, text_lab
+
     def classify_batch(self, wavs, wav_lens=None):
         """Performs classification on the top of the encoded features.
 
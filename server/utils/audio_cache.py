@@ -0,0 +1,142 @@
+"""
+On-disk cache of decoded 16 kHz audio, keyed by the upload's content hash.
+
+Re-analysing the same recording (retries, re-scoring, pipeline experiments)
+otherwise repeats the ffmpeg decode every time. Decoded PCM is stored as a
+.npy file per content hash and opened with np.load(mmap_mode='c'): pages come
+straight from the OS page cache and are shared by every reader of the same
+file, while copy-on-write keeps the array writable for consumers that expect
+that. The cache is bounded by total size and evicts least-recently-used
+entries (access time is tracked with the file mtime).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DecodedAudioCache:
+    """Size-bounded LRU cache of decoded audio arrays on disk.
+
+    Args:
+        root: Directory holding the cached .npy files.
+        max_bytes: Total size above which least-recently-used entries are evicted.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.npy")
+
+    def get(self, key):
+        """Memory-mapped array for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            audio = np.load(path, mmap_mode="c")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return audio
+
+    def put(self, key, audio):
+        """Store ``audio`` under ``key`` and return a memory-mapped view of it
+        (or the array itself if the entry is already gone again)."""
+        path = self._path(key)
+        audio = np.asarray(audio, dtype=np.float32)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, audio)
+        os.replace(tmp_path, path)  # atomic, so readers never see a partial file
+        # Map before evicting: the mapping stays valid even if a concurrent
+        # put evicts the file, and the new entry itself is never evicted here
+        cached = self.get(key)
+        self._evict(keep=key)
+        return cached if cached is not None else audio
+
+    def load(self, media_file, decode, key=None):
+        """Return the decoded audio of ``media_file``, decoding it with
+        ``decode(media_file)`` only on a cache miss.
+
+        Args:
+            media_file: Path to the upload.
+            decode: Callable returning a float32 array, or None on failure.
+            key: Content hash of the upload, if already known (computed otherwise).
+        """
+        key = key or file_sha256(media_file)
+        audio = self.get(key)
+        if audio is not None:
+            logger.info("Decoded audio cache hit for %s", media_file)
+            return audio
+        audio = decode(media_file)
+        if audio is None:
+            return None
+        try:
+            return self.put(key, audio)
+        except OSError:
+            logger.exception("Could not cache decoded audio for %s", media_file)
+            return audio
+
+    def _evict(self, keep=None):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if not name.endswith(".npy"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name == f"{keep}.npy":
+                    continue
+                try:
+                    # Open memory maps keep working after unlink on POSIX
+                    os.remove(os.path.join(self.root, name))
+                    total -= size
+                    logger.info("Evicted %s from decoded audio cache", name)
+                except OSError:
+                    pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_audio_cache():
+    """Process-wide cache in AUDIO_CACHE_DIR (default: audio_cache/ beside
+    Uploads/), bounded by AUDIO_CACHE_MAX_MB (default 2048)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DecodedAudioCache(
+                os.getenv("AUDIO_CACHE_DIR", "audio_cache"),
+                int(os.getenv("AUDIO_CACHE_MAX_MB", "2048")) * 1024 * 1024,
+            )
+        return _default_cache
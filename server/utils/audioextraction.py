@@ -2,16 +2,104 @@ import ffmpeg
 import os
 import numpy as np
 
+SAMPLE_RATE = 16000
+
+# Samples read from the ffmpeg pipe per block (30 s, one Whisper window)
+BLOCK_SAMPLES = 30 * SAMPLE_RATE
+
+
+def probe_duration(media_file: str) -> float | None:
+    """Duration of the file in seconds according to ffprobe, or None."""
+    try:
+        info = ffmpeg.probe(media_file)
+        duration = info.get("format", {}).get("duration")
+        return float(duration) if duration else None
+    except (ffmpeg.Error, ValueError, OSError):
+        return None
+
+
+def iter_audio_blocks(media_file: str, block_samples: int = BLOCK_SAMPLES):
+    """
+    Decode a file to 16 kHz mono float32 and yield it block by block as ffmpeg produces it.
+
+    The PCM stream is read straight from the ffmpeg pipe into a buffer that
+    is preallocated from the probed duration, so the whole recording is never
+    held as bytes and only one block-sized int16 staging area exists. Each
+    yielded block is a view into that buffer, so consumers can start work
+    before decoding finishes.
+
+    Args:
+        media_file (str): Path to the input video or audio file.
+        block_samples (int): Samples per yielded block.
+
+    Yields:
+        tuple (int, np.ndarray): Sample offset of the block and a float32
+        view of it. The final buffer is available as the generator's return
+        value (``StopIteration.value``).
+
+    Raises:
+        ffmpeg.Error: If ffmpeg exits with an error.
+    """
+    duration = probe_duration(media_file)
+    # Small margin so rounding in the container duration doesn't force a resize
+    capacity = int((duration or 60.0) * SAMPLE_RATE) + SAMPLE_RATE
+    audio = np.empty(capacity, dtype=np.float32)
+    staging = np.empty(block_samples, dtype=np.int16)
+    staging_bytes = memoryview(staging).cast("B")
+
+    process = (
+        ffmpeg
+        .input(media_file)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar='16k')
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    filled = 0
+    try:
+        while True:
+            # Fill the staging block completely unless the stream ends
+            got = 0
+            while got < len(staging_bytes):
+                n = process.stdout.readinto(staging_bytes[got:])
+                if not n:
+                    break
+                got += n
+            samples = got // 2
+            if samples == 0:
+                break
+            if filled + samples > len(audio):
+                # Probe was short or missing; grow geometrically (blocks already
+                # yielded keep referencing the old buffer and stay valid)
+                audio = np.resize(audio, max(len(audio) * 2, filled + samples))
+            block = audio[filled:filled + samples]
+            np.multiply(staging[:samples], 1.0 / 32768.0, out=block, casting='unsafe')
+            yield filled, block
+            filled += samples
+            if got < len(staging_bytes):
+                break
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise ffmpeg.Error('ffmpeg', b'', stderr)
+    return audio[:filled]
+
+
 def extract_audio_to_memory(video_file: str) -> np.ndarray | None:
     """
-    Extracts audio from a video file directly into an in-memory NumPy array.
+    Decodes the audio of a video or audio file directly into an in-memory NumPy array.
 
     This is the recommended function for the updated workflow as it avoids writing
     an intermediate WAV file to disk, which is faster. The output is specifically
-    formatted for the updated transcription and vocal emotion functions.
+    formatted for the updated transcription and vocal emotion functions, which
+    share this one buffer instead of decoding and resampling the file again.
+    Decoding streams through iter_audio_blocks, so peak memory is about one
+    float32 copy of the audio.
 
     Args:
-        video_file (str): Path to the input video file.
+        video_file (str): Path to the input video or audio file.
 
     Returns:
         np.ndarray: A NumPy array of the audio data, or None if it fails.
@@ -22,19 +110,13 @@ def extract_audio_to_memory(video_file: str) -> np.ndarray | None:
 
     try:
         print(f"Extracting audio from {video_file} into memory...")
-        # This command pipes the raw audio data to stdout. It's set to:
-        # - s16le: Signed 16-bit PCM audio format
-        # - ac 1: Mono audio (single channel)
-        # - ar 16k: 16000 Hz sample rate
-        out, _ = (
-            ffmpeg
-            .input(video_file)
-            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar='16k')
-            .run(capture_stdout=True, capture_stderr=True)
-        )
-        
-        # Convert the raw byte data into a normalized float32 NumPy array
-        audio_array = np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+        blocks = iter_audio_blocks(video_file)
+        while True:
+            try:
+                next(blocks)
+            except StopIteration as done:
+                audio_array = done.value
+                break
         print("Audio extraction to memory successful.")
         return audio_array
         
@@ -43,7 +125,6 @@ def extract_audio_to_memory(video_file: str) -> np.ndarray | None:
         print(f"An ffmpeg error occurred: {e.stderr.decode()}")
         return None
 
-
 '''
 def extract_audio_to_file(video_file: str, output_wav: str) -> bool:
     """
@@ -0,0 +1,145 @@
+"""
+Compact statistics over per-chunk vocal emotion predictions.
+
+The Gemini prompts used to inline the raw per-chunk list of dicts, which for
+a long speech costs thousands of tokens and is hard for the model to read.
+summarize_vocal_emotions reduces it (vectorized with NumPy) to the emotion
+distribution, mean class probabilities, confidence, transitions and
+stability; format_vocal_emotion_summary renders that as a few prompt lines.
+
+Windows the SER silence gate skipped are labelled SILENCE_LABEL. They are
+not an emotion: they only count towards speaking vs. silent time and are
+left out of the distribution, transitions and stability.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+# Label of SER windows without speech (see utils.vocals.speech_windows)
+SILENCE_LABEL = "silence"
+
+# Runs shorter than this are left out of the condensed timeline
+_MIN_RUN_S = 8.0
+_MAX_TIMELINE_RUNS = 12
+_LOW_CONFIDENCE = 0.5
+
+
+def summarize_vocal_emotions(vocal_emotions: List[Dict]) -> Dict:
+    """
+    Summarize per-chunk vocal emotions.
+
+    Args:
+        vocal_emotions: Chunks with "emotion", "start_time", "end_time" and,
+                        when available, "confidence" and "probabilities"
+
+    Returns:
+        dict: duration, speaking/silent time, dominant emotion, time share
+        per emotion (of speaking time), mean class probabilities, mean
+        confidence, transition counts/rate, stability and a condensed
+        timeline of the longer runs
+    """
+    all_chunks = [c for c in vocal_emotions or [] if c.get("emotion")]
+    chunks = [c for c in all_chunks if c["emotion"] != SILENCE_LABEL]
+    silence_s = float(sum(max(c.get("end_time", 0.0) - c.get("start_time", 0.0), 0.0)
+                          for c in all_chunks if c["emotion"] == SILENCE_LABEL))
+    if not chunks:
+        return {"chunks": 0, "silence_s": round(silence_s, 1)}
+
+    labels = np.array([c["emotion"] for c in chunks])
+    starts = np.array([c.get("start_time", 0.0) for c in chunks], dtype=float)
+    ends = np.array([c.get("end_time", 0.0) for c in chunks], dtype=float)
+    durations = np.clip(ends - starts, 0.0, None)
+    total_s = float(durations.sum()) or float(len(chunks))
+    weights = durations if durations.sum() > 0 else np.ones(len(chunks))
+
+    emotions, codes = np.unique(labels, return_inverse=True)
+    share = np.bincount(codes, weights=weights, minlength=len(emotions)) / weights.sum()
+    distribution = {str(e): round(float(s), 3) for e, s in sorted(zip(emotions, share), key=lambda x: -x[1])}
+
+    summary = {
+        "chunks": len(chunks),
+        "duration_s": round(float(max(c.get("end_time", 0.0) for c in all_chunks)
+                                  - min(c.get("start_time", 0.0) for c in all_chunks)), 1),
+        "speaking_s": round(float(durations.sum()), 1),
+        "silence_s": round(silence_s, 1),
+        "dominant": next(iter(distribution)),
+        "distribution": distribution,
+    }
+
+    # Mean class probabilities and confidence (time-weighted)
+    with_probs = [i for i, c in enumerate(chunks) if c.get("probabilities")]
+    if with_probs:
+        classes = sorted(chunks[with_probs[0]]["probabilities"])
+        probs = np.array([[chunks[i]["probabilities"].get(k, 0.0) for k in classes] for i in with_probs])
+        mean_probs = np.average(probs, axis=0, weights=weights[with_probs])
+        summary["mean_probabilities"] = {k: round(float(p), 3) for k, p in zip(classes, mean_probs)}
+    confidence = np.array([c.get("confidence", np.nan) for c in chunks], dtype=float)
+    if not np.isnan(confidence).all():
+        known = ~np.isnan(confidence)
+        summary["mean_confidence"] = round(float(np.average(confidence[known], weights=weights[known])), 3)
+        summary["low_confidence_share"] = round(float((confidence[known] < _LOW_CONFIDENCE).mean()), 3)
+
+    # Transitions between consecutive speech chunks (pauses in between
+    # don't count as a change)
+    changed = codes[1:] != codes[:-1]
+    n_transitions = int(changed.sum())
+    pairs = np.zeros((len(emotions), len(emotions)), dtype=int)
+    np.add.at(pairs, (codes[:-1][changed], codes[1:][changed]), 1)
+    top = np.argsort(pairs, axis=None)[::-1][:3]
+    summary["transitions"] = {
+        "count": n_transitions,
+        "per_minute": round(n_transitions / (total_s / 60.0), 2) if total_s else 0.0,
+        "most_common": [
+            f"{emotions[i]}->{emotions[j]} ({pairs[i, j]})"
+            for i, j in zip(*np.unravel_index(top, pairs.shape)) if pairs[i, j] > 0
+        ],
+    }
+
+    # Stability: share of consecutive chunks keeping the same emotion,
+    # normalized entropy of the distribution and the longest steady run
+    run_bounds = np.flatnonzero(np.concatenate(([True], changed, [True])))
+    run_starts, run_ends = run_bounds[:-1], run_bounds[1:] - 1
+    # Speaking time per run, so pauses inside a run don't lengthen it
+    speaking = np.concatenate(([0.0], np.cumsum(durations)))
+    run_lengths_s = speaking[run_ends + 1] - speaking[run_starts]
+    entropy = -(share * np.log(share)).sum() / np.log(len(emotions)) if len(emotions) > 1 else 0.0
+    longest = int(np.argmax(run_lengths_s))
+    summary["stability"] = {
+        "same_as_previous": round(float(1.0 - changed.mean()), 3) if len(changed) else 1.0,
+        "entropy": round(float(entropy), 3),
+        "longest_run": f"{labels[run_starts[longest]]} for {run_lengths_s[longest]:.0f}s",
+    }
+
+    long_runs = np.flatnonzero(run_lengths_s >= _MIN_RUN_S)[:_MAX_TIMELINE_RUNS]
+    summary["timeline"] = [
+        f"{labels[run_starts[r]]} {starts[run_starts[r]]:.0f}-{ends[run_ends[r]]:.0f}s" for r in long_runs
+    ]
+    return summary
+
+
+def format_vocal_emotion_summary(summary: Dict) -> str:
+    """Render a vocal emotion summary as a few compact lines for LLM prompts."""
+    if not summary.get("chunks"):
+        return "No vocal emotion data"
+    lines = [
+        f"Vocal emotions over {summary['duration_s']}s ({summary['chunks']} speech chunks), "
+        f"dominant: {summary['dominant']}",
+        f"Speaking time: {summary['speaking_s']}s, silent/non-speech: {summary['silence_s']}s",
+        "Share of speaking time: " + ", ".join(f"{e} {s:.0%}" for e, s in summary["distribution"].items()),
+    ]
+    if "mean_probabilities" in summary:
+        lines.append("Mean probabilities: " + ", ".join(
+            f"{e} {p:.2f}" for e, p in summary["mean_probabilities"].items()))
+    if "mean_confidence" in summary:
+        lines.append(f"Mean confidence: {summary['mean_confidence']:.2f} "
+                     f"({summary['low_confidence_share']:.0%} of chunks below {_LOW_CONFIDENCE})")
+    transitions = summary["transitions"]
+    lines.append(f"Transitions: {transitions['count']} ({transitions['per_minute']}/min)"
+                 + (f", most common {', '.join(transitions['most_common'])}" if transitions["most_common"] else ""))
+    stability = summary["stability"]
+    lines.append(f"Stability: {stability['same_as_previous']:.0%} of chunks keep the previous emotion, "
+                 f"entropy {stability['entropy']:.2f}, longest run {stability['longest_run']}")
+    if summary["timeline"]:
+        lines.append("Timeline: " + "; ".join(summary["timeline"]))
+    return "\n".join(lines)
@@ -1,15 +1,379 @@
 import cv2
+import ffmpeg
+import numpy as np
 from deepface import DeepFace
 import pandas as pd
+import multiprocessing
+import logging
+import threading
 import warnings
 import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.stage_executor import cpu_budget
 
 # Suppress TensorFlow warnings for a cleaner output
 warnings.filterwarnings("ignore")
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
+logger = logging.getLogger(__name__)
+
+
+# Ways of pulling sampled frames out of a video (FACIAL_FRAME_BACKEND)
+FRAME_BACKENDS = ("grab", "ffmpeg")
+
+
+def default_frame_backend() -> str:
+    """Frame sampler used by analyze_video_emotions (FACIAL_FRAME_BACKEND, default "grab")."""
+    backend = os.getenv("FACIAL_FRAME_BACKEND", "grab").strip().lower()
+    return backend if backend in FRAME_BACKENDS else "grab"
+
+
+# How far before a range to seek, so the decoder lands at or before it
+_SEEK_PREROLL_S = 2.0
+
+
+def _seek_to_frame(cap, start_frame: int, fps: float) -> int:
+    """
+    Position ``cap`` exactly at ``start_frame`` and return it.
+
+    Seeking with CAP_PROP_POS_FRAMES is not frame-accurate for codecs with
+    B-frames, so seek a little early, read back where the decoder actually
+    landed (seeking earlier again if it overshot) and grab forward to the
+    requested frame. The returned position then matches a serial pass.
+    """
+    preroll = max(1, int(fps * _SEEK_PREROLL_S))
+    target = start_frame - preroll
+    while True:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, max(target, 0))
+        position = int(round(cap.get(cv2.CAP_PROP_POS_FRAMES)))
+        if position <= start_frame or target <= 0:
+            break
+        target -= preroll
+    if position > start_frame:
+        # Still past the range start: decode from the beginning
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        position = 0
+    while position < start_frame and cap.grab():
+        position += 1
+    return position
+
+
+def _grab_frames(video_file_path: str, sample_rate: int, start_frame: int = 0, end_frame: int = None):
+    """
+    Yield (timestamp, BGR frame) for one frame per 1/sample_rate seconds
+    in frames [start_frame, end_frame).
+
+    Skipped frames are only grabbed (demuxed and decoded, no colour
+    conversion or copy); retrieve() runs for the sampled frames alone.
+    """
+    cap = cv2.VideoCapture(video_file_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_file_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if fps <= 0:
+            fps = 30.0
+        frame_interval = max(1, int(fps / sample_rate))
+
+        frame_count = _seek_to_frame(cap, start_frame, fps) if start_frame else 0
+        while (end_frame is None or frame_count < end_frame) and cap.grab():
+            if frame_count % frame_interval == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    yield frame_count / fps, frame
+            frame_count += 1
+    finally:
+        cap.release()
+
+
+def _ffmpeg_frames(video_file_path: str, sample_rate: int, start_frame: int = 0, end_frame: int = None):
+    """
+    Yield (timestamp, BGR frame) like _grab_frames, but let ffmpeg's select
+    filter drop the skipped frames so only sampled ones are converted to
+    raw BGR and piped out.
+    """
+    info = ffmpeg.probe(video_file_path, select_streams="v:0")
+    if not info.get("streams"):
+        raise IOError(f"No video stream in {video_file_path}")
+    stream = info["streams"][0]
+    num, _, den = stream.get("avg_frame_rate", "0/1").partition("/")
+    fps = float(num) / float(den) if float(den or 0) and float(num) else 30.0
+    frame_interval = max(1, int(fps / sample_rate))
+
+    width, height = int(stream["width"]), int(stream["height"])
+    # ffmpeg auto-rotates, so portrait phone videos come out transposed
+    rotation = stream.get("tags", {}).get("rotate") or next(
+        (side.get("rotation") for side in stream.get("side_data_list", []) if "rotation" in side), 0)
+    if abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+
+    output_args = {"format": "rawvideo", "pix_fmt": "bgr24", "vsync": "passthrough"}
+    if end_frame is not None:
+        output_args["frames:v"] = -(-(end_frame - start_frame) // frame_interval)
+    process = (
+        ffmpeg
+        .input(video_file_path, **({"ss": start_frame / fps} if start_frame else {}))
+        .video
+        .filter("select", f"not(mod(n,{frame_interval}))")
+        .output("pipe:", **output_args)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    frame_bytes = width * height * 3
+    sampled = 0
+    try:
+        while True:
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            if process.stdout.readinto(memoryview(frame).cast("B")) != frame_bytes:
+                break
+            yield (start_frame + sampled * frame_interval) / fps, frame
+            sampled += 1
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def iter_sampled_frames(video_file_path: str, sample_rate: int = 1, backend: str = None,
+                        start_frame: int = 0, end_frame: int = None):
+    """
+    Yield (timestamp in seconds, BGR frame) for sample_rate frames per second.
+
+    Args:
+        video_file_path (str): Path to the video file.
+        sample_rate (int): Frames per second to sample.
+        backend (str): "grab" (OpenCV grab/retrieve) or "ffmpeg" (select
+                       filter piping raw BGR); defaults to FACIAL_FRAME_BACKEND.
+        start_frame (int): First frame of the range; should be a multiple of
+                           the sampling interval so the same frames are
+                           sampled as in a full pass.
+        end_frame (int): End of the range (exclusive), None for the end.
+    """
+    backend = backend or default_frame_backend()
+    if backend == "ffmpeg":
+        return _ffmpeg_frames(video_file_path, sample_rate, start_frame, end_frame)
+    return _grab_frames(video_file_path, sample_rate, start_frame, end_frame)
+
+
+def _empty_scores() -> dict:
+    return {
+        'angry': 0.0, 'disgust': 0.0, 'fear': 0.0, 'happy': 0.0,
+        'sad': 0.0, 'surprise': 0.0, 'neutral': 0.0
+    }
+
+
+# Ways of running the emotion model on sampled frames (FACIAL_ENGINE)
+FACIAL_ENGINES = ("batched", "analyze")
+
+
+def default_facial_engine() -> str:
+    """Emotion engine used by analyze_video_emotions (FACIAL_ENGINE, default "batched")."""
+    engine = os.getenv("FACIAL_ENGINE", "batched").strip().lower()
+    return engine if engine in FACIAL_ENGINES else "batched"
+
+
+def default_facial_batch_size() -> int:
+    """Face crops per emotion-model forward pass (FACIAL_BATCH_SIZE, default 32)."""
+    return max(1, int(os.getenv("FACIAL_BATCH_SIZE", "32")))
+
+
+def _analyze_frames(frames):
+    """Yield (timestamp, emotion percentages, dominant emotion) with one
+    DeepFace.analyze call (detection + emotion CNN) per frame."""
+    for current_time, frame in frames:
+        try:
+            result = DeepFace.analyze(
+                img_path=frame,
+                actions=['emotion'],
+                enforce_detection=False,
+                detector_backend='opencv',
+                silent=True
+            )
+            if result and result[0]:
+                yield current_time, result[0]['emotion'], result[0]['dominant_emotion']
+        except Exception:
+            pass
+
+
+def _analyze_frames_batched(frames, batch_size: int):
+    """
+    Yield the same (timestamp, emotion percentages, dominant emotion) as
+    _analyze_frames, but run the emotion CNN on stacked batches of faces.
+
+    Detection and alignment still go through DeepFace.extract_faces per
+    frame; each face crop is preprocessed exactly as DeepFace.analyze does
+    (BGR, padded resize to 224x224, grayscale 48x48) and queued, and the
+    Emotion model runs once per ``batch_size`` crops.
 
-def analyze_video_emotions(video_file_path: str, sample_rate: int = 1):
+    The model is loaded before returning, so a DeepFace release without the
+    expected internals raises here rather than mid-iteration.
+    """
+    from deepface.modules import modeling, preprocessing
+    from deepface.models.demography.Emotion import labels
+
+    model = modeling.build_model(task="facial_attribute", model_name="Emotion").model
+
+    def flush(pending):
+        batch = np.stack([crop for _, crop in pending])[..., np.newaxis]
+        try:
+            predictions = np.asarray(model.predict_on_batch(batch))
+        except Exception as e:
+            print(f"Error running the emotion model on {len(pending)} faces: {e}")
+            return
+        predictions = 100 * predictions / predictions.sum(axis=1, keepdims=True)
+        for (current_time, _), scores in zip(pending, predictions):
+            yield current_time, dict(zip(labels, scores.tolist())), labels[int(np.argmax(scores))]
+
+    def run():
+        pending = []
+        for current_time, frame in frames:
+            try:
+                faces = DeepFace.extract_faces(
+                    img_path=frame,
+                    detector_backend='opencv',
+                    enforce_detection=False,
+                    align=True
+                )
+                face = faces[0]["face"] if faces else None
+                if face is None or face.shape[0] == 0 or face.shape[1] == 0:
+                    continue
+                face = preprocessing.resize_image(img=face[:, :, ::-1], target_size=(224, 224))
+                crop = cv2.resize(cv2.cvtColor(face[0].astype(np.float32), cv2.COLOR_BGR2GRAY), (48, 48))
+            except Exception:
+                continue
+            pending.append((current_time, crop))
+            if len(pending) >= batch_size:
+                yield from flush(pending)
+                pending = []
+        if pending:
+            yield from flush(pending)
+
+    return run()
+
+
+def _analyze_range(video_file_path: str, sample_rate: int, backend: str, engine: str = "batched",
+                   start_frame: int = 0, end_frame: int = None):
+    """
+    Run DeepFace on the sampled frames of one frame range.
+
+    Returns the summed emotion scores and the timeline entries of the range
+    (without chunk numbers, which are assigned after merging). Runs in the
+    worker processes of the facial pool as well as in-process.
+    """
+    emotion_scores = _empty_scores()
+    timeline = []
+    frames = iter_sampled_frames(video_file_path, sample_rate, backend, start_frame, end_frame)
+    if engine == "batched":
+        try:
+            # Only builds the model; frames are consumed lazily below
+            results = _analyze_frames_batched(frames, default_facial_batch_size())
+        except Exception:
+            # DeepFace internals differ between releases (missing modules,
+            # renamed helpers, model download/load failures); keep working
+            logger.warning("Batched facial engine unavailable; using DeepFace.analyze", exc_info=True)
+            results = _analyze_frames(frames)
+    else:
+        results = _analyze_frames(frames)
+
+    for current_time, frame_emotions, dominant in results:
+        for emotion, score in frame_emotions.items():
+            if emotion in emotion_scores:
+                emotion_scores[emotion] += (score / 100.0)
+        timeline.append({
+            "start_time": current_time,
+            "end_time": current_time + (1.0 / sample_rate),
+            "emotion": dominant,
+        })
+    return emotion_scores, timeline
+
+
+# Ranges shorter than this aren't worth a worker (seek + queueing overhead)
+_MIN_RANGE_S = 30.0
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_facial_workers() -> int:
+    """Worker processes for facial analysis (FACIAL_WORKERS, default min(4, CPUs))."""
+    return max(1, int(os.getenv("FACIAL_WORKERS", str(min(4, os.cpu_count() or 1)))))
+
+
+def _limit_worker_threads(num_threads: int):
+    """
+    Pool initializer: cap the TensorFlow and OpenCV thread pools of a worker
+    so that all workers together stay within the analysis CPU budget (their
+    defaults each use every core). Runs before the worker's first op, while
+    TensorFlow's threading can still be configured.
+    """
+    cv2.setNumThreads(num_threads)
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(num_threads)
+    except (ImportError, RuntimeError):
+        logger.warning("Could not limit TensorFlow threads in facial worker", exc_info=True)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Shared process pool, created on first use and kept so that each worker
+    loads TensorFlow and the DeepFace models once rather than per video.
+    Spawned (not forked) because TensorFlow is not fork-safe. Each worker
+    gets an equal share of the CPU budget (see cpu_budget).
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_limit_worker_threads,
+                                        initargs=(max(1, cpu_budget() // workers),))
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _plan_ranges(video_file_path: str, sample_rate: int, workers: int) -> list:
+    """
+    Split the video into up to ``workers`` frame ranges aligned to the
+    sampling interval; a single open-ended range when it's too short to
+    be worth splitting.
+    """
+    cap = cv2.VideoCapture(video_file_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_file_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps <= 0:
+        fps = 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    frame_interval = max(1, int(fps / sample_rate))
+    samples = -(-total_frames // frame_interval)
+    min_samples = max(1, int(_MIN_RANGE_S * fps / frame_interval))
+    per_range = max(-(-samples // workers), min_samples) if samples else 1
+    starts = list(range(0, samples, per_range)) or [0]
+    # The frame count in the header can be off, so the last range is open-ended
+    return [
+        (start * frame_interval, None if i == len(starts) - 1 else starts[i + 1] * frame_interval)
+        for i, start in enumerate(starts)
+    ]
+
+
+def analyze_video_emotions(video_file_path: str, sample_rate: int = 1, backend: str = None,
+                           workers: int = None, engine: str = None):
     """
     Analyzes emotions by sampling frames and summing emotion scores using DeepFace.
     Returns both a DataFrame of aggregated scores and a timeline of dominant emotions.
@@ -18,6 +382,15 @@ def analyze_video_emotions(video_file_path: str, sample_rate: int = 1):
         video_file_path (str): Path to the video file to be analyzed.
         sample_rate (int): The number of frames to process per second.
                            Defaults to 1.
+        backend (str): Frame sampler, see iter_sampled_frames. Only the
+                       sampled frames are fully decoded to BGR.
+        workers (int): Processes analysing time ranges of the video in
+                       parallel (default: FACIAL_WORKERS). Each opens its own
+                       capture and seeks to its range; results are merged
+                       in order.
+        engine (str): "batched" (detect faces per frame, emotion CNN on
+                      stacked crops) or "analyze" (one DeepFace.analyze per
+                      frame); defaults to FACIAL_ENGINE.
 
     Returns:
         tuple (pd.DataFrame, list): 
@@ -25,62 +398,42 @@ def analyze_video_emotions(video_file_path: str, sample_rate: int = 1):
             - List of timeline chunks.
     """
     try:
-        cap = cv2.VideoCapture(video_file_path)
-        if not cap.isOpened():
-            print(f"Error: Could not open video file {video_file_path}")
-            return pd.DataFrame(), []
-
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if fps <= 0:
-            fps = 30.0
-        frame_interval = max(1, int(fps / sample_rate))
-
-        emotion_scores = {
-            'angry': 0.0, 'disgust': 0.0, 'fear': 0.0, 'happy': 0.0,
-            'sad': 0.0, 'surprise': 0.0, 'neutral': 0.0
-        }
-        
-        timeline = []
-        frame_count = 0
-        chunk_idx = 0
+        backend = backend or default_frame_backend()
+        workers = workers or default_facial_workers()
+        engine = engine or default_facial_engine()
         print(f"Starting emotion analysis for {video_file_path} at {sample_rate} FPS...")
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break 
-            
-            if frame_count % frame_interval == 0:
+        try:
+            ranges = _plan_ranges(video_file_path, sample_rate, workers)
+            if len(ranges) > 1:
+                print(f"Analyzing {len(ranges)} time ranges in {workers} worker processes...")
                 try:
-                    result = DeepFace.analyze(
-                        img_path=frame,
-                        actions=['emotion'],
-                        enforce_detection=False,
-                        detector_backend='opencv',
-                        silent=True
-                    )
-                    
-                    if result and result[0]:
-                        frame_emotions = result[0]['emotion']
-                        for emotion, score in frame_emotions.items():
-                            if emotion in emotion_scores:
-                                emotion_scores[emotion] += (score / 100.0)
-                        
-                        dominant = result[0]['dominant_emotion']
-                        current_time = frame_count / fps
-                        timeline.append({
-                            "start_time": current_time,
-                            "end_time": current_time + (1.0 / sample_rate),
-                            "emotion": dominant,
-                            "chunk": chunk_idx
-                        })
-                        chunk_idx += 1
-                except Exception:
-                    pass
-            
-            frame_count += 1
+                    pool = _get_pool(workers)
+                    futures = [
+                        pool.submit(_analyze_range, video_file_path, sample_rate, backend, engine, start, end)
+                        for start, end in ranges
+                    ]
+                    range_results = [future.result() for future in futures]
+                except BrokenProcessPool as e:
+                    print(f"Facial analysis pool failed ({e}); analyzing in-process")
+                    _reset_pool()
+                    range_results = [_analyze_range(video_file_path, sample_rate, backend, engine)]
+            else:
+                range_results = [_analyze_range(video_file_path, sample_rate, backend, engine)]
+        except (IOError, ffmpeg.Error) as e:
+            print(f"Error: {e}")
+            return pd.DataFrame(), []
+
+        # Merge ranges in order
+        emotion_scores = _empty_scores()
+        timeline = []
+        for range_scores, range_timeline in range_results:
+            for emotion, score in range_scores.items():
+                emotion_scores[emotion] += score
+            timeline.extend(range_timeline)
+        for chunk_idx, entry in enumerate(timeline):
+            entry["chunk"] = chunk_idx
             
-        cap.release()
         print("Emotion analysis finished successfully.")
 
         score_comparisons = pd.DataFrame({
@@ -0,0 +1,388 @@
+"""
+Local job queue for long-running analysis uploads.
+
+/upload only saves the file and enqueues a job here, then returns the job id
+immediately. A small pool of worker threads claims queued jobs and runs the
+analysis pipeline, recording progress per stage so clients can poll
+GET /jobs/<id> instead of holding one request open for minutes.
+
+Every finished stage also appends an event (timings plus any partial result,
+e.g. the transcript as soon as Whisper is done) that GET /jobs/<id>/events
+streams to the client as Server-Sent Events.
+
+Jobs are stored in a local SQLite file, so the queue survives restarts and
+can be exercised without MongoDB or any other outside service. Several
+server processes may share one file: each claim records the claiming
+process and a heartbeat it refreshes while alive, and only claims whose
+heartbeat has gone stale (the process died) are put back in the queue.
+Finished jobs and their events are deleted after a retention period.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Stage lifecycle
+STAGE_PENDING = "pending"
+STAGE_RUNNING = "running"
+STAGE_DONE = "done"
+STAGE_SKIPPED = "skipped"
+STAGE_CACHED = "cached"
+STAGE_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    stages      TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    claimed_by  TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT NOT NULL,
+    event       TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job_seq ON job_events (job_id, seq);
+"""
+
+# Columns added after the first release, for databases created before them
+_ADDED_COLUMNS = {"claimed_by": "TEXT", "heartbeat_at": "REAL"}
+
+
+class JobQueue:
+    """Thread-safe SQLite-backed job queue with an in-process worker pool.
+
+    Args:
+        db_path: SQLite file, possibly shared with other server processes.
+        heartbeat_interval: Seconds between heartbeats of this process's claims.
+        stale_after: Seconds without a heartbeat after which a RUNNING job is
+                     considered abandoned and queued again.
+        retention_s: Seconds finished (done or failed) jobs and their events
+                     are kept; None keeps them forever.
+    """
+
+    def __init__(self, db_path, heartbeat_interval=15.0, stale_after=120.0, retention_s=7 * 24 * 3600):
+        self._db_path = db_path
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.retention_s = retention_s
+        # Identifies this queue's claims among processes sharing the file
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._new_event = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+        self._workers = []
+        self._stopping = threading.Event()
+
+    def _migrate(self):
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for name, kind in _ADDED_COLUMNS.items():
+            if name not in columns:
+                try:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+                except sqlite3.OperationalError:
+                    pass  # added concurrently by another process
+
+    # ------------------------------------------------------------------ #
+    #  Producer side                                                       #
+    # ------------------------------------------------------------------ #
+
+    def enqueue(self, payload, stages=()):
+        """Store a new job and wake one worker. Returns the job id.
+
+        ``stages`` lists the pipeline stages up front so progress can be
+        reported as a fraction before the worker has touched them."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        stage_map = {name: {"status": STAGE_PENDING} for name in stages}
+        with self._wakeup:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, stages, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), json.dumps(stage_map), now, now),
+            )
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it doesn't exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    # ------------------------------------------------------------------ #
+    #  Worker side                                                         #
+    # ------------------------------------------------------------------ #
+
+    def claim_next(self):
+        """Atomically move the oldest queued job to RUNNING, claimed by this
+        queue's owner, and return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = ?, heartbeat_at = ? WHERE id = ?",
+                    (RUNNING, now, self.owner, now, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row_to_job(row)
+        job["status"] = RUNNING
+        return job
+
+    def update_stage(self, job_id, stage, status, **info):
+        """Set the status (and optional timing/info fields) of one stage."""
+        with self._lock:
+            row = self._conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row["stages"])
+            entry = stages.setdefault(stage, {})
+            entry["status"] = status
+            entry.update(info)
+            self._conn.execute(
+                "UPDATE jobs SET stages = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(stages), time.time(), job_id),
+            )
+
+    @contextmanager
+    def stage(self, job_id, name):
+        """Context manager that marks a stage running, then done or failed,
+        recording its wall-clock duration and emitting a ``stage`` event.
+
+        Yields a dict; anything the caller puts under ``partial`` is sent
+        with the event so clients can show early results."""
+        started = time.time()
+        self.update_stage(job_id, name, STAGE_RUNNING, started_at=started)
+        outcome = {"partial": {}}
+        try:
+            yield outcome
+        except Exception:
+            elapsed = round(time.time() - started, 3)
+            self.update_stage(job_id, name, STAGE_FAILED, elapsed=elapsed)
+            self._emit_stage(job_id, name, STAGE_FAILED, elapsed)
+            raise
+        elapsed = round(time.time() - started, 3)
+        self.update_stage(job_id, name, STAGE_DONE, elapsed=elapsed)
+        self._emit_stage(job_id, name, STAGE_DONE, elapsed, outcome["partial"])
+
+    def skip_stage(self, job_id, name):
+        self.update_stage(job_id, name, STAGE_SKIPPED)
+        self._emit_stage(job_id, name, STAGE_SKIPPED, 0.0)
+
+    def reuse_stage(self, job_id, name):
+        """Mark a stage whose result was reused from an earlier identical upload."""
+        self.update_stage(job_id, name, STAGE_CACHED)
+        self._emit_stage(job_id, name, STAGE_CACHED, 0.0)
+
+    def complete(self, job_id, result):
+        self._finish(job_id, DONE, result=json.dumps(result, default=str))
+        self.add_event(job_id, "done", {"reportId": result.get("_id")})
+
+    def fail(self, job_id, error):
+        self._finish(job_id, FAILED, error=str(error))
+        self.add_event(job_id, "failed", {"error": str(error)})
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+
+    def heartbeat(self):
+        """Mark every job this queue is running as still alive."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND claimed_by = ?",
+                (time.time(), RUNNING, self.owner),
+            )
+
+    def requeue_stale(self):
+        """Queue RUNNING jobs again whose claim hasn't had a heartbeat for
+        ``stale_after`` seconds (their process died). Returns how many."""
+        with self._wakeup:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, claimed_by = NULL, heartbeat_at = NULL, updated_at = ? "
+                "WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (QUEUED, time.time(), RUNNING, time.time() - self.stale_after),
+            )
+            if cursor.rowcount:
+                logger.warning("Requeued %d job(s) abandoned by a stopped process", cursor.rowcount)
+                self._wakeup.notify_all()
+            return cursor.rowcount
+
+    def prune(self):
+        """Delete finished jobs (and their events) older than ``retention_s``.
+        Returns how many jobs were removed."""
+        if self.retention_s is None:
+            return 0
+        cutoff = time.time() - self.retention_s
+        finished = "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(f"DELETE FROM job_events WHERE job_id IN ({finished})", (DONE, FAILED, cutoff))
+                cursor = self._conn.execute(f"DELETE FROM jobs WHERE id IN ({finished})", (DONE, FAILED, cutoff))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if cursor.rowcount:
+            logger.info("Pruned %d finished job(s)", cursor.rowcount)
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------ #
+    #  Progress events (consumed by the SSE endpoint)                      #
+    # ------------------------------------------------------------------ #
+
+    def add_event(self, job_id, event, data):
+        """Append an event to the job's log and wake any SSE listeners."""
+        with self._new_event:
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, event, json.dumps(data, default=str), time.time()),
+            )
+            self._new_event.notify_all()
+
+    def events_since(self, job_id, after_seq=0):
+        """Return the job's events with a sequence number above ``after_seq``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq),
+            ).fetchall()
+        return [{"seq": r["seq"], "event": r["event"], "data": json.loads(r["data"])} for r in rows]
+
+    def wait_for_events(self, timeout):
+        """Block until any job emits an event or ``timeout`` seconds pass."""
+        with self._new_event:
+            return self._new_event.wait(timeout=timeout)
+
+    def _emit_stage(self, job_id, name, status, elapsed, partial=None):
+        job = self.get(job_id)
+        if job is None:
+            return
+        timings = {
+            stage: info["elapsed"]
+            for stage, info in job["stages"].items()
+            if "elapsed" in info
+        }
+        self.add_event(job_id, "stage", {
+            "stage": name,
+            "status": status,
+            "elapsed": elapsed,
+            "timings": timings,
+            "progress": job["progress"],
+            "partial": partial or {},
+        })
+
+    # ------------------------------------------------------------------ #
+    #  Worker pool                                                         #
+    # ------------------------------------------------------------------ #
+
+    def start_workers(self, handler, num_workers=1, poll_interval=5.0):
+        """Start ``num_workers`` daemon threads that call ``handler(job)`` for
+        each claimed job, plus a housekeeping thread that sends heartbeats
+        for this process's claims, requeues stale claims of stopped
+        processes and prunes old finished jobs. Safe to call once per process."""
+        if self._workers:
+            return
+
+        def _housekeeping():
+            while True:
+                try:
+                    self.heartbeat()
+                    self.requeue_stale()
+                    self.prune()
+                except sqlite3.Error:
+                    logger.exception("Job queue housekeeping failed")
+                if self._stopping.wait(self.heartbeat_interval):
+                    return
+
+        def _loop():
+            while not self._stopping.is_set():
+                job = self.claim_next()
+                if job is None:
+                    with self._wakeup:
+                        self._wakeup.wait(timeout=poll_interval)
+                    continue
+                try:
+                    handler(job)
+                except Exception as e:
+                    logger.exception("Job %s failed", job["id"])
+                    self.fail(job["id"], e)
+
+        threads = [threading.Thread(target=_housekeeping, name="job-queue-housekeeping", daemon=True)]
+        threads += [
+            threading.Thread(target=_loop, name=f"analysis-worker-{i}", daemon=True)
+            for i in range(max(1, num_workers))
+        ]
+        for thread in threads:
+            thread.start()
+            self._workers.append(thread)
+        logger.info("Started %d analysis worker(s) on %s as %s", len(threads) - 1, self._db_path, self.owner)
+
+    def stop(self):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    # ------------------------------------------------------------------ #
+    #  Helpers                                                             #
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _row_to_job(row):
+        stages = json.loads(row["stages"])
+        finished = sum(1 for s in stages.values() if s.get("status") in (STAGE_DONE, STAGE_SKIPPED, STAGE_CACHED))
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "stages": stages,
+            "progress": round(finished / len(stages), 3) if stages else 0.0,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
@@ -724,13 +724,18 @@ def analyze_sentence_structure(text: str) -> Dict[str, Any]:
     }
 
 
-def get_speech_segments_with_timestamps(transcription: str, vocal_emotions: List[Dict]) -> List[Dict]:
+def get_speech_segments_with_timestamps(transcription: str, vocal_emotions: List[Dict],
+                                        transcript_segments: List[Dict] = None) -> List[Dict]:
     """
     Align transcription with emotion timestamps for detailed feedback
     
     Args:
         transcription: Full transcription text
         vocal_emotions: List of emotion chunks with timestamps
+        transcript_segments: Optional timed segments from the transcription
+            engine (each with a "words" list of {"word", "start", "end"}).
+            When given, words are placed by their actual times; otherwise
+            positions are estimated from a constant speaking rate.
         
     Returns:
         List of segments with text and emotion
@@ -738,6 +743,28 @@ def get_speech_segments_with_timestamps(transcription: str, vocal_emotions: List
     if not vocal_emotions or not transcription:
         return []
     
+    if transcript_segments:
+        timed_words = [w for seg in transcript_segments for w in seg.get('words', [])]
+        if timed_words:
+            # Assign each word to the emotion chunk containing its midpoint
+            midpoints = np.array([(w['start'] + w['end']) / 2 for w in timed_words])
+            chunk_starts = np.array([c['start_time'] for c in vocal_emotions])
+            chunk_idx = np.searchsorted(chunk_starts, midpoints, side='right') - 1
+            texts = [[] for _ in vocal_emotions]
+            for word, idx in zip(timed_words, chunk_idx):
+                if idx >= 0:
+                    texts[idx].append(word['word'])
+            return [
+                {
+                    "start_time": chunk['start_time'],
+                    "end_time": chunk['end_time'],
+                    "text": ' '.join(texts[i]),
+                    "emotion": chunk['emotion'],
+                    "chunk": chunk.get('chunk', 0)
+                }
+                for i, chunk in enumerate(vocal_emotions)
+            ]
+    
     words = transcription.split()
     total_duration = vocal_emotions[-1]['end_time'] if vocal_emotions else 0
     
@@ -768,13 +795,15 @@ def get_speech_segments_with_timestamps(transcription: str, vocal_emotions: List
     return segments
 
 
-def analyze_transcript_complete(transcription: str, vocal_emotions: List[Dict] = None) -> Dict[str, Any]:
+def analyze_transcript_complete(transcription: str, vocal_emotions: List[Dict] = None,
+                                transcript_segments: List[Dict] = None) -> Dict[str, Any]:
     """
     Perform complete linguistic analysis on transcription using spaCy
     
     Args:
         transcription: Full transcription text
         vocal_emotions: Optional list of emotion chunks with timestamps
+        transcript_segments: Optional timed segments from speech_to_text_long
         
     Returns:
         Comprehensive dictionary with all linguistic metrics
@@ -814,7 +843,9 @@ def analyze_transcript_complete(transcription: str, vocal_emotions: List[Dict] =
     
     # Add segments if vocal emotions provided
     if vocal_emotions:
-        analysis['segments'] = get_speech_segments_with_timestamps(transcription, vocal_emotions)
+        analysis['segments'] = get_speech_segments_with_timestamps(
+            transcription, vocal_emotions, transcript_segments
+        )
     
     print("Linguistic analysis complete.")
     return analysis
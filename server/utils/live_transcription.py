@@ -0,0 +1,176 @@
+"""
+Incremental transcription for live microphone sessions.
+
+The client streams raw PCM (mono float32, 16 kHz) in small fragments while the
+speaker is still talking. Every time a full window has been buffered it is cut
+at the quietest point near its end and handed to Whisper on a background
+thread, so by the time recording stops only the last partial window is left
+to decode. The rolling transcript and timed segments are kept per session and
+passed on to the analysis job, which then skips straight to the later stages.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Sessions that receive no audio for this long are dropped
+SESSION_IDLE_TIMEOUT_S = 15 * 60
+
+
+class LiveTranscriptionSession:
+    """Buffers streamed audio and transcribes it one window at a time.
+
+    Args:
+        tier: Transcription quality tier passed to Whisper.
+        window_s: Audio per Whisper call (at most 30 s).
+        search_s: How far back from the window end to look for a pause to cut at.
+    """
+
+    def __init__(self, tier=None, window_s=30.0, search_s=5.0):
+        self.id = uuid.uuid4().hex
+        self.tier = tier
+        self.window = int(min(window_s, 30.0) * SAMPLE_RATE)
+        self.search = int(search_s * SAMPLE_RATE)
+        self.last_activity = time.time()
+
+        self._lock = threading.Lock()
+        self._fragments = []          # everything received, for the final WAV
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pending_start = 0       # sample offset of _pending in the recording
+        self._received = 0
+        self._texts = []
+        self._segments = []
+        # One thread keeps windows in order and leaves cores for the recorder
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"live-{self.id[:8]}")
+        self._futures = []
+        self._closed = False
+
+    # ------------------------------------------------------------------ #
+
+    def add_audio(self, samples):
+        """Append a fragment of float32 samples and schedule full windows."""
+        samples = np.asarray(samples, dtype=np.float32)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Live session is already finished")
+            self.last_activity = time.time()
+            self._fragments.append(samples)
+            self._received += len(samples)
+            self._pending = np.concatenate([self._pending, samples])
+            while len(self._pending) >= self.window:
+                cut = self._find_cut(self._pending[:self.window])
+                self._submit(self._pending[:cut], self._pending_start)
+                self._pending = self._pending[cut:]
+                self._pending_start += cut
+
+    def finish(self):
+        """Transcribe what's left, wait for every window and return
+        (audio, text, segments) for the whole recording."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                if len(self._pending):
+                    self._submit(self._pending, self._pending_start)
+                    self._pending = np.zeros(0, dtype=np.float32)
+        for future in list(self._futures):
+            future.result()
+        self._executor.shutdown(wait=True)
+        audio = np.concatenate(self._fragments) if self._fragments else np.zeros(0, dtype=np.float32)
+        return audio, self.transcript, list(self._segments)
+
+    def cancel(self):
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------ #
+
+    @property
+    def transcript(self):
+        return " ".join(t for t in self._texts if t)
+
+    @property
+    def received_s(self):
+        return self._received / SAMPLE_RATE
+
+    def status(self):
+        done = sum(1 for f in self._futures if f.done())
+        return {
+            "sessionId": self.id,
+            "receivedSeconds": round(self.received_s, 2),
+            "windowsTranscribed": done,
+            "windowsPending": len(self._futures) - done,
+            "transcript": self.transcript,
+        }
+
+    # ------------------------------------------------------------------ #
+
+    def _find_cut(self, window):
+        """Cut at the quietest 30 ms frame in the last ``search`` samples."""
+        from utils.transcription import _frame_levels_db
+
+        frame = int(0.03 * SAMPLE_RATE)
+        tail_start = max(0, len(window) - self.search)
+        levels = _frame_levels_db(window[tail_start:], frame)
+        if not len(levels):
+            return len(window)
+        return tail_start + int(np.argmin(levels)) * frame + frame // 2
+
+    def _submit(self, audio, start_sample):
+        self._futures.append(self._executor.submit(self._transcribe, audio.copy(), start_sample))
+
+    def _transcribe(self, audio, start_sample):
+        from utils.transcription import transcribe_batch
+
+        offset_s = start_sample / SAMPLE_RATE
+        started = time.time()
+        text, segments = transcribe_batch([audio], batch_size=1, return_timestamps=True, tier=self.tier)[0]
+        for seg in segments:
+            seg["start"] = round(seg["start"] + offset_s, 2)
+            seg["end"] = round(seg["end"] + offset_s, 2)
+            for word in seg.get("words", []):
+                word["start"] = round(word["start"] + offset_s, 2)
+                word["end"] = round(word["end"] + offset_s, 2)
+        # Windows are transcribed in order on a single thread
+        self._texts.append(text.strip())
+        self._segments.extend(segments)
+        logger.info("Live session %s: %.1fs window at %.1fs transcribed in %.1fs",
+                    self.id, len(audio) / SAMPLE_RATE, offset_s, time.time() - started)
+
+
+class LiveSessionRegistry:
+    """In-process registry of open live sessions with idle expiry."""
+
+    def __init__(self, idle_timeout_s=SESSION_IDLE_TIMEOUT_S):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._idle_timeout_s = idle_timeout_s
+
+    def create(self, **kwargs):
+        session = LiveTranscriptionSession(**kwargs)
+        with self._lock:
+            self._expire_idle()
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def pop(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def _expire_idle(self):
+        cutoff = time.time() - self._idle_timeout_s
+        for session_id in [s for s, sess in self._sessions.items() if sess.last_activity < cutoff]:
+            logger.info("Dropping idle live session %s", session_id)
+            self._sessions.pop(session_id).cancel()
@@ -0,0 +1,168 @@
+"""
+Memoization of the pure (deterministic, context-independent) analysis stages.
+
+Transcription, vocal emotion recognition, facial emotion analysis and the
+spaCy linguistic analysis only depend on their inputs and on the model that
+produced them, so their results are cached under a key built from:
+
+    stage name + stage version + the stage's own key parts
+    (e.g. audio content hash, Whisper model and tier)
+
+Lookups go through a small in-process LRU first and then a persistent store
+(pickles on disk by default). Bumping a stage's entry in STAGE_VERSIONS when
+its model or algorithm changes invalidates every older result for that stage
+without touching the others. Hit/miss counters per stage are exposed through
+``stats()`` and the /health endpoint.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Bump a stage's version when its model, parameters or code change
+STAGE_VERSIONS = {
+    "transcription": "3",
+    "vocal_emotion": "8",
+    "facial_analysis": "2",
+    "linguistic_analysis": "1",
+}
+
+
+def hash_value(value):
+    """Stable SHA-256 of a JSON-serializable value (e.g. a transcript)."""
+    payload = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class DiskStore:
+    """Persistent store: one pickle per key under ``root``."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return True, pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except (OSError, pickle.UnpicklingError, EOFError):
+            logger.warning("Discarding unreadable stage cache entry %s", key)
+            return False, None
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+class StageCache:
+    """In-process LRU in front of a persistent store, with per-stage counters.
+
+    Args:
+        store: Persistent store with ``get(key) -> (found, value)`` and
+               ``set(key, value)``, or None for memory only.
+        memory_items: Entries kept in the in-process LRU.
+        versions: Stage name -> version string (default: STAGE_VERSIONS).
+    """
+
+    def __init__(self, store=None, memory_items=64, versions=None):
+        self.store = store
+        self.memory_items = memory_items
+        self.versions = dict(STAGE_VERSIONS if versions is None else versions)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def key(self, stage, *parts):
+        version = self.versions.get(stage, "1")
+        return hash_value([stage, version, *parts])
+
+    def get_or_compute(self, stage, key_parts, compute, cacheable=None):
+        """Return the cached result of ``stage`` for ``key_parts``, calling
+        ``compute()`` and storing its result on a miss. A None key part
+        (e.g. an unknown content hash) bypasses the cache.
+
+        ``cacheable(result)`` can reject results that must not be stored,
+        such as the placeholder a stage returns after an error; they are
+        returned but computed again next time."""
+        if any(part is None for part in key_parts):
+            return compute()
+        key = self.key(stage, *key_parts)
+        found, value = self._lookup(key)
+        self._count(stage, "hits" if found else "misses")
+        if found:
+            logger.info("Stage cache hit for %s", stage)
+            return value
+
+        value = compute()
+        if cacheable is not None and not cacheable(value):
+            logger.warning("Not caching incomplete %s result", stage)
+            return value
+        self._remember(key, value)
+        if self.store is not None:
+            try:
+                self.store.set(key, value)
+            except (OSError, pickle.PicklingError, TypeError):
+                logger.exception("Could not persist %s result", stage)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {stage: dict(counts) for stage, counts in self._stats.items()}
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                # Callers may mutate results; keep the cached copy pristine
+                return True, copy.deepcopy(self._memory[key])
+        if self.store is None:
+            return False, None
+        found, value = self.store.get(key)
+        if found:
+            self._remember(key, value)
+        return found, value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = copy.deepcopy(value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _count(self, stage, field):
+        with self._lock:
+            counts = self._stats.setdefault(stage, {"hits": 0, "misses": 0})
+            counts[field] += 1
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_stage_cache():
+    """Process-wide stage cache persisted under STAGE_CACHE_DIR (default:
+    stage_cache/); STAGE_CACHE_DIR="" keeps it in memory only."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            root = os.getenv("STAGE_CACHE_DIR", "stage_cache")
+            _default_cache = StageCache(
+                store=DiskStore(root) if root else None,
+                memory_items=int(os.getenv("STAGE_CACHE_MEMORY_ITEMS", "64")),
+            )
+        return _default_cache
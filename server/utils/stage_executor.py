@@ -0,0 +1,290 @@
+"""
+Stage scheduler shared by the upload worker and DetailedAnalysisPipeline.
+
+Every pipeline stage is declared as a StageNode with the named values it
+consumes (inputs) and produces (outputs). StageGraph runs every node whose
+inputs are available in parallel on a thread pool, skips nodes that don't
+apply to the current input (e.g. facial analysis for audio-only uploads),
+and records per-stage timings plus the critical path through the graph.
+
+Facial analysis (DeepFace), transcription (Whisper) and vocal emotion
+recognition (wav2vec2) don't depend on each other, so they overlap; the
+heavy work happens inside native kernels that release the GIL, so threads
+are enough to keep several cores busy.
+
+To avoid oversubscribing the machine, the per-process CPU budget
+(ANALYSIS_CPU_THREADS, default: all cores) is divided by the number of
+stages that can run at the same time (the graph's width) and applied to the
+PyTorch / OpenCV intra-op thread pools. Those settings are process-wide,
+not per thread, so they are set once when a graph run starts and restored
+when the last concurrent run finishes.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_budget():
+    """Number of CPU threads this process may use for ML inference."""
+    configured = os.getenv("ANALYSIS_CPU_THREADS")
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def apply_thread_budget(num_threads, skip=()):
+    """Cap the intra-op thread pools of already-imported ML libraries (except
+    those named in ``skip``). These are process-wide settings; returns the
+    previous values for restore_thread_budget()."""
+    previous = {}
+    torch = sys.modules.get("torch") if "torch" not in skip else None
+    if torch is not None:
+        previous["torch"] = torch.get_num_threads()
+        torch.set_num_threads(num_threads)
+    cv2 = sys.modules.get("cv2") if "cv2" not in skip else None
+    if cv2 is not None:
+        previous["cv2"] = cv2.getNumThreads()
+        cv2.setNumThreads(num_threads)
+    return previous
+
+
+def restore_thread_budget(previous):
+    """Undo apply_thread_budget()."""
+    if "torch" in previous:
+        sys.modules["torch"].set_num_threads(previous["torch"])
+    if "cv2" in previous:
+        sys.modules["cv2"].setNumThreads(previous["cv2"])
+
+
+# Graph runs in flight (one per analysis worker) and the thread settings to
+# restore once the last of them finishes
+_budget_lock = threading.Lock()
+_active_runs = 0
+_saved_budget = {}
+
+
+def _enter_thread_budget(num_threads):
+    global _active_runs, _saved_budget
+    with _budget_lock:
+        previous = apply_thread_budget(num_threads)
+        if _active_runs == 0:
+            _saved_budget = previous
+        _active_runs += 1
+
+
+def _refresh_thread_budget(num_threads):
+    """Apply the budget to libraries a stage imported since the run started
+    (models are imported lazily, inside the stages)."""
+    with _budget_lock:
+        if _active_runs:
+            _saved_budget.update(apply_thread_budget(num_threads, skip=_saved_budget))
+
+
+def _exit_thread_budget():
+    global _active_runs
+    with _budget_lock:
+        _active_runs -= 1
+        if _active_runs == 0:
+            restore_thread_budget(_saved_budget)
+
+
+class StageNode:
+    """One pipeline stage: a callable plus the named values it reads and writes.
+
+    Args:
+        name: Stage name used for timings and progress reporting.
+        fn: Called with the inputs as keyword arguments. Returns the single
+            output, a tuple matching ``outputs``, or None if it has none.
+        inputs: Names of the values the stage needs.
+        outputs: Names of the values the stage produces.
+        applies: Optional predicate on the stage's inputs (a dict); when it
+                 returns False the stage is skipped. It only sees declared
+                 inputs, so reading anything else fails loudly.
+        on_skip: Optional callable on the stage's inputs returning the
+                 outputs to use when the stage is skipped (defaults to None
+                 for every output).
+    """
+
+    def __init__(self, name, fn, inputs=(), outputs=(), applies=None, on_skip=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.applies = applies
+        self.on_skip = on_skip
+
+    def unpack(self, result):
+        """Map the callable's return value onto the declared output names."""
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if not isinstance(result, tuple) or len(result) != len(self.outputs):
+            raise ValueError(f"Stage '{self.name}' must return {len(self.outputs)} values")
+        return dict(zip(self.outputs, result))
+
+
+class StageGraph:
+    """Dependency-driven scheduler for a set of StageNodes."""
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self._producers = {}
+        for node in self.nodes:
+            for output in node.outputs:
+                if output in self._producers:
+                    raise ValueError(f"'{output}' is produced by both "
+                                     f"'{self._producers[output].name}' and '{node.name}'")
+                self._producers[output] = node
+
+    def run(self, initial, max_workers=None, budget=None, on_skip=None):
+        """Run the graph to completion.
+
+        Args:
+            initial: Values available before any stage runs.
+            max_workers: Maximum number of stages in flight at once.
+            budget: Total CPU threads shared by concurrently running stages
+                    (defaults to ``cpu_budget()``); each stage gets an equal
+                    share for the whole run.
+            on_skip: Optional callback ``on_skip(name)`` for skipped stages.
+
+        Returns:
+            tuple (dict, dict, tuple):
+                - All values (initial plus every stage output).
+                - Wall-clock seconds per stage (0.0 for skipped stages).
+                - Critical path as (list of stage names, seconds).
+
+        Raises:
+            The first stage exception, after in-flight stages have finished.
+        """
+        values = dict(initial)
+        timings = {}
+        pending = list(self.nodes)
+        budget = budget or cpu_budget()
+        max_workers = max_workers or max(1, len(self.nodes))
+        threads = max(1, budget // min(max_workers, self.width()))
+        _enter_thread_budget(threads)
+        try:
+            return self._run(values, timings, pending, max_workers, threads, on_skip)
+        finally:
+            _exit_thread_budget()
+
+    def _run(self, values, timings, pending, max_workers, threads, on_skip):
+        def _run_node(node, kwargs):
+            _refresh_thread_budget(threads)
+            started = time.time()
+            try:
+                result = node.fn(**kwargs)
+            finally:
+                _refresh_thread_budget(threads)
+            return node.unpack(result), time.time() - started
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+            running = {}
+            while pending or running:
+                ready = [n for n in pending if all(i in values for i in n.inputs)]
+                progressed = False
+                for node in ready:
+                    if node.applies is None:
+                        continue
+                    inputs = {i: values[i] for i in node.inputs}
+                    try:
+                        applies = node.applies(inputs)
+                    except KeyError as e:
+                        raise ValueError(f"Stage '{node.name}' condition reads {e}, "
+                                         f"which is not one of its inputs") from None
+                    if not applies:
+                        pending.remove(node)
+                        skipped = node.on_skip(inputs) if node.on_skip else None
+                        values.update(node.unpack(skipped) if skipped is not None
+                                      else {o: None for o in node.outputs})
+                        timings[node.name] = 0.0
+                        if on_skip:
+                            on_skip(node.name)
+                        progressed = True
+                if progressed:
+                    # Skipped stages may have unlocked others; re-evaluate
+                    continue
+
+                launchable = ready[:max(0, max_workers - len(running))]
+                for node in launchable:
+                    pending.remove(node)
+                    kwargs = {i: values[i] for i in node.inputs}
+                    running[pool.submit(_run_node, node, kwargs)] = node
+
+                if not running:
+                    missing = {i for n in pending for i in n.inputs if i not in values}
+                    raise ValueError(f"Stage graph is stuck; missing inputs: {sorted(missing)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        outputs, elapsed = future.result()
+                    except Exception:
+                        # Let in-flight stages finish before propagating
+                        wait(running)
+                        raise
+                    values.update(outputs)
+                    timings[node.name] = elapsed
+
+        return values, timings, self.critical_path(timings)
+
+    def width(self):
+        """Most stages that can ever run at the same time: the largest set of
+        stages none of which depends (transitively) on another."""
+        ancestors = {}
+        for node in self._topological_order():
+            preds = {self._producers[i] for i in node.inputs if i in self._producers}
+            ancestors[node.name] = set().union(*(ancestors[p.name] | {p.name} for p in preds))
+        names = list(ancestors)
+        if len(names) > 16:
+            # Too many subsets to check; assume everything may overlap
+            return len(names)
+        for size in range(len(names), 1, -1):
+            for group in combinations(names, size):
+                if not any(a in ancestors[b] for a in group for b in group):
+                    return size
+        return 1
+
+    def critical_path(self, timings):
+        """Longest chain of dependent stages, by recorded wall-clock time."""
+        finish, via = {}, {}
+        for node in self._topological_order():
+            preds = {self._producers[i] for i in node.inputs if i in self._producers}
+            best = max(preds, key=lambda p: finish[p.name], default=None)
+            finish[node.name] = timings.get(node.name, 0.0) + (finish[best.name] if best else 0.0)
+            via[node.name] = best.name if best else None
+        if not finish:
+            return [], 0.0
+        name = max(finish, key=finish.get)
+        total = finish[name]
+        path = []
+        while name:
+            path.append(name)
+            name = via[name]
+        return path[::-1], total
+
+    def _topological_order(self):
+        order, seen = [], set()
+
+        def visit(node):
+            if node.name in seen:
+                return
+            seen.add(node.name)
+            for i in node.inputs:
+                if i in self._producers:
+                    visit(self._producers[i])
+            order.append(node)
+
+        for node in self.nodes:
+            visit(node)
+        return order
+
@@ -0,0 +1,56 @@
+"""
+Configuration each memoized analysis stage depends on besides its input,
+and which of its results may be cached.
+
+The settings lists are part of the stage cache keys (utils/stage_cache.py)
+in both the upload graph (app.py) and DetailedAnalysisPipeline, and of the
+upload index key in app.py, so every caller keys a stage on the same
+settings. The stages return placeholders instead of raising when they fail
+(an empty transcript, a single "neutral" chunk, an empty DataFrame); the
+*_cacheable checks keep those out of the cache so a transient failure is
+retried on the next run. Heavy modules are imported lazily, as the callers
+only need them once a stage actually runs.
+"""
+
+from utils.emotion_summary import SILENCE_LABEL
+
+
+def transcription_settings(tier: str = None) -> list:
+    """Whisper model, tier, beams, assisted decoding, quantization and chunking."""
+    from utils.transcription import decoding_settings
+    return decoding_settings(tier)
+
+
+def vocal_emotion_settings(chunk_duration: float = 4.0) -> list:
+    """SER window length, hop (the window length when not sliding) and the
+    audio per wav2vec2 pass."""
+    from utils.vocals import default_ser_hop_duration, default_ser_segment_duration
+    hop = default_ser_hop_duration()
+    return [chunk_duration, hop or chunk_duration, default_ser_segment_duration()]
+
+
+def facial_settings(sample_rate: int = 1) -> list:
+    """Sampled frames per second, emotion engine and frame backend."""
+    from utils.expressions import default_facial_engine, default_frame_backend
+    return [sample_rate, default_facial_engine(), default_frame_backend()]
+
+
+def transcription_cacheable(result: dict) -> bool:
+    """False for the empty transcript speech_to_text_long returns on errors."""
+    return bool(result["text"])
+
+
+def vocal_emotion_cacheable(results: list) -> bool:
+    """True when every window was classified or marked silent; False for
+    the neutral placeholder predict_emotion returns on errors and for
+    results missing windows whose classification failed."""
+    return bool(results) and all(
+        entry["chunk"] == number and ("confidence" in entry or entry["emotion"] == SILENCE_LABEL)
+        for number, entry in enumerate(results, 1)
+    )
+
+
+def facial_cacheable(result: tuple) -> bool:
+    """False for the empty DataFrame analyze_video_emotions returns on errors."""
+    scores, _ = result
+    return not scores.empty
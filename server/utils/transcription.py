@@ -1,20 +1,49 @@
 #
 # transcription.py  — lazy-loaded via model_manager
 #
+import os
+import re
 import torch
 import warnings
-from typing import Union, List
+from typing import Union, List, Tuple
 import numpy as np
 
 warnings.filterwarnings("ignore", category=UserWarning, module='torchaudio')
 
 # Models are loaded lazily through model_manager (no eager init here)
-from model_manager import model_manager
+from model_manager import model_manager, TRANSCRIPTION_TIERS, resolve_tier, whisper_quantization_enabled
 
 
-def _get_model():
-    """Return (processor, model, device) from the shared model manager."""
-    return model_manager.get_whisper()
+def _get_model(tier: str = None):
+    """Return (processor, model, device) for the tier from the shared model manager."""
+    return model_manager.get_whisper(TRANSCRIPTION_TIERS[resolve_tier(tier)]["model"])
+
+def assisted_decoding_enabled(assisted: bool = None) -> bool:
+    """Assisted decoding is opt-in: pass assisted=True or set WHISPER_ASSISTED=1."""
+    if assisted is None:
+        return os.getenv("WHISPER_ASSISTED", "").lower() in ("1", "true", "yes")
+    return bool(assisted)
+
+def default_chunking() -> str:
+    """How long audio is split: "vad" (at pauses) or "fixed" (TRANSCRIPTION_CHUNKING, default "vad")."""
+    return os.getenv("TRANSCRIPTION_CHUNKING", "vad")
+
+def decoding_settings(tier: str = None, assisted: bool = None, chunking: str = None) -> list:
+    """Everything that changes transcription output for a given audio file;
+    used to key cached transcripts."""
+    tier = resolve_tier(tier)
+    return [TRANSCRIPTION_TIERS[tier]["model"], tier, TRANSCRIPTION_TIERS[tier]["num_beams"],
+            assisted_decoding_enabled(assisted), whisper_quantization_enabled(),
+            chunking or default_chunking()]
+
+def _generate_kwargs(tier: str = None, assisted: bool = False) -> dict:
+    kwargs = dict(GENERATE_KWARGS, num_beams=TRANSCRIPTION_TIERS[resolve_tier(tier)]["num_beams"])
+    if assisted:
+        # The draft model proposes several tokens and the tier model checks
+        # them in one forward pass; the output equals greedy decoding of the
+        # tier model, so beams are turned off
+        kwargs.update(num_beams=1, assistant_model=model_manager.get_whisper_draft())
+    return kwargs
 
 def chunk_audio(audio: np.ndarray, chunk_duration_s: int = 30, overlap_s: float = 0.5, sample_rate: int = 16000) -> List[np.ndarray]:
     """
@@ -44,22 +73,298 @@ def chunk_audio(audio: np.ndarray, chunk_duration_s: int = 30, overlap_s: float
     print(f"Split audio into {len(chunks)} chunks of ~{chunk_duration_s}s each")
     return chunks
 
-def transcribe_chunk(audio_chunk: np.ndarray, sample_rate: int = 16000) -> str:
+def _frame_levels_db(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """Per-frame RMS level in dB for non-overlapping frames (vectorized)."""
+    num_frames = len(audio) // frame_length
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+# Minimum level above the noise floor for a frame to count as speech
+_NOISE_MARGIN_DB = 6.0
+
+def detect_speech_regions(audio: np.ndarray, sample_rate: int = 16000, frame_ms: int = 30,
+                          min_silence_s: float = 0.3, min_speech_s: float = 0.25,
+                          padding_s: float = 0.1) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection.
+
+    Frames louder than an adaptive threshold (30% of the way from the noise
+    floor to the loud speech level, at most 35 dB below it, but always at
+    least 6 dB above the noise floor) count as speech; a recording with
+    less dynamic range than that is kept whole. Pauses shorter than
+    ``min_silence_s`` are bridged, blips shorter than ``min_speech_s`` are
+    dropped, and each region is padded so word edges aren't clipped.
+
+    Returns:
+        List of (start_sample, end_sample) speech regions
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    levels = _frame_levels_db(audio, frame_length)
+    if levels.size == 0:
+        return []
+
+    noise_floor = np.percentile(levels, 10)
+    speech_level = np.percentile(levels, 95)
+    # Never demand more than 35 dB above the quietest speech worth keeping,
+    # so recordings without real pauses aren't cut into pieces; but stay
+    # above the noise floor, or on noisy recordings (SNR under ~40 dB)
+    # every frame would count as speech
+    threshold = min(noise_floor + 0.3 * (speech_level - noise_floor), speech_level - 35.0)
+    threshold = max(threshold, noise_floor + _NOISE_MARGIN_DB, -60.0)
+    # Too little dynamic range to tell pauses apart (continuous speech): keep it all
+    threshold = min(threshold, speech_level - _NOISE_MARGIN_DB)
+    is_speech = levels > threshold
+
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if starts.size == 0:
+        return []
+
+    # Bridge short pauses
+    frame_s = frame_length / sample_rate
+    keep_gap = (starts[1:] - ends[:-1]) * frame_s >= min_silence_s
+    starts = np.concatenate((starts[:1], starts[1:][keep_gap]))
+    ends = np.concatenate((ends[:-1][keep_gap], ends[-1:]))
+
+    # Drop blips
+    long_enough = (ends - starts) * frame_s >= min_speech_s
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    pad = int(padding_s * sample_rate)
+    start_samples = np.maximum(starts * frame_length - pad, 0)
+    end_samples = np.minimum(ends * frame_length + pad, len(audio))
+    return list(zip(start_samples.tolist(), end_samples.tolist()))
+
+def _split_long_region(audio: np.ndarray, start: int, end: int, max_length: int,
+                       frame_length: int) -> List[Tuple[int, int]]:
+    """Cut a region longer than ``max_length`` at its quietest frames."""
+    pieces = []
+    while end - start > max_length:
+        # Search the second half of the window for the quietest frame
+        search_from = start + max_length // 2
+        levels = _frame_levels_db(audio[search_from:start + max_length], frame_length)
+        cut = search_from + int(np.argmin(levels)) * frame_length if levels.size else start + max_length
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+def vad_chunk_audio(audio: np.ndarray, max_chunk_s: float = 30.0, sample_rate: int = 16000) -> List[dict]:
+    """
+    Split audio at pauses and pack the speech into chunks of up to ~30 s.
+
+    Silence between speech regions is dropped, so less audio reaches the
+    decoder and no word straddles a chunk boundary.
+
+    Returns:
+        List of dicts with:
+            - "audio": the packed speech (float32 array)
+            - "spans": list of (source_start_s, chunk_offset_s, duration_s)
+              mapping positions in the chunk back to the original audio
+    """
+    max_length = int(max_chunk_s * sample_rate)
+    frame_length = int(0.03 * sample_rate)
+
+    regions = []
+    for start, end in detect_speech_regions(audio, sample_rate):
+        regions.extend(_split_long_region(audio, start, end, max_length, frame_length))
+
+    chunks, current, current_length = [], [], 0
+    for start, end in regions:
+        if current and current_length + (end - start) > max_length:
+            chunks.append(current)
+            current, current_length = [], 0
+        current.append((start, end))
+        current_length += end - start
+    if current:
+        chunks.append(current)
+
+    packed = []
+    for regions_in_chunk in chunks:
+        spans, offset = [], 0
+        for start, end in regions_in_chunk:
+            spans.append((start / sample_rate, offset / sample_rate, (end - start) / sample_rate))
+            offset += end - start
+        chunk_audio_data = np.concatenate([audio[start:end] for start, end in regions_in_chunk])
+        packed.append({"audio": chunk_audio_data, "spans": spans})
+
+    speech_s = sum(len(c["audio"]) for c in packed) / sample_rate
+    print(f"VAD: kept {speech_s:.1f}s of speech out of {len(audio) / sample_rate:.1f}s "
+          f"in {len(packed)} chunks")
+    return packed
+
+# Decoding settings shared by single-chunk and batched transcription
+GENERATE_KWARGS = dict(
+    max_new_tokens=440,  # Reduced to avoid exceeding max_target_positions
+    num_beams=5,  # Beam search for better quality
+    temperature=0.0,  # Deterministic output
+    do_sample=False,  # No sampling with temperature=0
+    language="en",  # Force English
+    task="transcribe"  # Transcription task
+)
+
+# Rough peak working memory per chunk in a whisper-medium beam-search batch
+_BYTES_PER_BATCH_ITEM = 400 * 1024 * 1024
+_MAX_BATCH_SIZE = 16
+
+
+def _prepare_chunk(audio_chunk: np.ndarray) -> np.ndarray:
+    """Coerce a chunk to float32 in the [-1, 1] range Whisper expects."""
+    # Ensure audio chunk is the right type
+    if not isinstance(audio_chunk, np.ndarray):
+        audio_chunk = np.array(audio_chunk)
+    
+    if audio_chunk.dtype != np.float32:
+        audio_chunk = audio_chunk.astype(np.float32)
+    
+    # Normalize audio to [-1, 1] range if needed
+    peak = np.abs(audio_chunk).max() if audio_chunk.size else 0.0
+    if peak > 1.0:
+        audio_chunk = audio_chunk / peak
+    return audio_chunk
+
+def default_batch_size(device: str) -> int:
+    """
+    Pick how many chunks to decode per generate call.
+
+    WHISPER_BATCH_SIZE overrides; otherwise the size is derived from free GPU
+    memory or available system RAM so large batches don't exhaust memory.
+    """
+    configured = os.getenv("WHISPER_BATCH_SIZE")
+    if configured:
+        return max(1, int(configured))
+    try:
+        if str(device).startswith("cuda"):
+            free_bytes, _ = torch.cuda.mem_get_info()
+        else:
+            free_bytes = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError, RuntimeError):
+        return 4
+    return int(max(1, min(_MAX_BATCH_SIZE, free_bytes // _BYTES_PER_BATCH_ITEM)))
+
+def _is_out_of_memory(error: Exception) -> bool:
+    return isinstance(error, MemoryError) or "out of memory" in str(error).lower()
+
+# Whisper timestamp tokens are spaced 20 ms apart
+_TIME_PRECISION_S = 0.02
+# Samples per log-mel frame of the Whisper feature extractor
+_HOP_LENGTH = 160
+
+def _split_words(start: float, end: float, text: str) -> List[dict]:
+    """Spread a segment's duration over its words in proportion to their length
+    (an estimate, used only when token timestamps are unavailable)."""
+    words = text.split()
+    if not words:
+        return []
+    weights = np.array([len(w) + 1 for w in words], dtype=np.float64)
+    bounds = start + (end - start) * np.concatenate(([0.0], np.cumsum(weights) / weights.sum()))
+    return [
+        {"word": w, "start": round(float(bounds[i]), 2), "end": round(float(bounds[i + 1]), 2)}
+        for i, w in enumerate(words)
+    ]
+
+def _token_timestamps_available(model, assisted: bool) -> bool:
+    """Whether generate() can time each token from the cross-attentions: the
+    checkpoint must define alignment heads, and assisted decoding (whose
+    outputs come from two models) isn't supported."""
+    return not assisted and getattr(model.generation_config, "alignment_heads", None) is not None
+
+def _words_from_tokens(tokenizer, tokens: List[Tuple[int, int]], token_times: List[float],
+                       start: float, end: float) -> List[dict]:
+    """
+    Group a segment's (index, token id) pairs into words and time them with
+    generate()'s token_timestamps: token i spans token_times[i] to
+    token_times[i + 1]. A token whose BPE piece starts with a space starts
+    a new word; punctuation stays attached to the preceding word.
+    """
+    groups = []
+    for index, token in tokens:
+        piece = tokenizer.convert_ids_to_tokens(token)
+        if not groups or piece.startswith("\u0120"):  # Ġ: byte-level BPE's leading space
+            groups.append([])
+        groups[-1].append((index, token))
+
+    def time_at(i):
+        t = token_times[i] if i < len(token_times) else end
+        return round(min(max(float(t), start), end), 2)
+
+    words = []
+    for group in groups:
+        text = tokenizer.decode([token for _, token in group], skip_special_tokens=True).strip()
+        if text:
+            word_start = time_at(group[0][0])
+            words.append({"word": text, "start": word_start, "end": max(time_at(group[-1][0] + 1), word_start)})
+    return words
+
+def _segments_from_tokens(tokenizer, token_ids: List[int], chunk_duration_s: float,
+                          token_times: List[float] = None) -> List[dict]:
+    """
+    Split a generated sequence into timed segments using Whisper's timestamp
+    tokens (<|0.00|> text <|2.40|>). Times are relative to the chunk start.
+    Falls back to one segment spanning the chunk if no timestamps were emitted.
+
+    Word times come from ``token_times`` (generate's token_timestamps,
+    aligned with token_ids) when given, else they are interpolated inside
+    each segment by word length.
+    """
+    timestamp_begin = tokenizer.convert_tokens_to_ids("<|0.00|>")
+    special_ids = set(tokenizer.all_special_ids)
+    segments, current, start = [], [], 0.0
+
+    def close(end):
+        text = tokenizer.decode([token for _, token in current], skip_special_tokens=True).strip()
+        if text:
+            end = min(max(end, start), chunk_duration_s)
+            words = (_words_from_tokens(tokenizer, current, token_times, start, end)
+                     if token_times is not None else _split_words(start, end, text))
+            segments.append({"start": start, "end": end, "text": text, "words": words})
+
+    for index, token in enumerate(token_ids):
+        if timestamp_begin != tokenizer.unk_token_id and token >= timestamp_begin:
+            time_s = (token - timestamp_begin) * _TIME_PRECISION_S
+            if current:
+                close(time_s)
+                current = []
+            start = time_s
+        elif token not in special_ids:
+            current.append((index, token))
+    if current:
+        close(chunk_duration_s)
+    return segments
+
+def _to_source_time(t: float, spans: List[Tuple[float, float, float]]) -> float:
+    """Map a time inside a (possibly VAD-packed) chunk back to the original audio."""
+    for source_start, offset, duration in reversed(spans):
+        if t >= offset:
+            return round(source_start + min(t - offset, duration), 2)
+    return round(spans[0][0], 2)
+
+def _segments_to_source(segments: List[dict], spans: List[Tuple[float, float, float]]) -> List[dict]:
+    mapped = []
+    for seg in segments:
+        mapped.append({
+            "start": _to_source_time(seg["start"], spans),
+            "end": _to_source_time(seg["end"], spans),
+            "text": seg["text"],
+            "words": [
+                {"word": w["word"], "start": _to_source_time(w["start"], spans),
+                 "end": _to_source_time(w["end"], spans)}
+                for w in seg["words"]
+            ],
+        })
+    return mapped
+
+def transcribe_chunk(audio_chunk: np.ndarray, sample_rate: int = 16000, tier: str = None,
+                     assisted: bool = None) -> str:
     """
     Transcribe a single audio chunk using Whisper.
     """
-    processor, model, device = _get_model()
+    processor, model, device = _get_model(tier)
+    assisted = assisted_decoding_enabled(assisted)
     try:
-        # Ensure audio chunk is the right type
-        if not isinstance(audio_chunk, np.ndarray):
-            audio_chunk = np.array(audio_chunk)
-        
-        if audio_chunk.dtype != np.float32:
-            audio_chunk = audio_chunk.astype(np.float32)
-        
-        # Normalize audio to [-1, 1] range if needed
-        if np.abs(audio_chunk).max() > 1.0:
-            audio_chunk = audio_chunk / np.abs(audio_chunk).max()
+        audio_chunk = _prepare_chunk(audio_chunk)
         
         # Prepare input features
         input_features = processor(
@@ -73,15 +378,7 @@ def transcribe_chunk(audio_chunk: np.ndarray, sample_rate: int = 16000) -> str:
         
         # Generate transcription with supported parameters only
         with torch.no_grad():
-            predicted_ids = model.generate(
-                input_features,
-                max_new_tokens=440,  # Reduced to avoid exceeding max_target_positions
-                num_beams=5,  # Beam search for better quality
-                temperature=0.0,  # Deterministic output
-                do_sample=False,  # No sampling with temperature=0
-                language="en",  # Force English
-                task="transcribe"  # Transcription task
-            )
+            predicted_ids = model.generate(input_features, **_generate_kwargs(tier, assisted))
         
         # Decode the transcription
         transcription = processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
@@ -102,65 +399,162 @@ def transcribe_chunk(audio_chunk: np.ndarray, sample_rate: int = 16000) -> str:
             print(f"Fallback also failed: {fallback_error}")
             return ""
 
-def remove_duplicate_phrases(text: str, window_size: int = 5) -> str:
+def transcribe_batch(audio_chunks: List[np.ndarray], batch_size: int = None, sample_rate: int = 16000,
+                     return_timestamps: bool = False, tier: str = None, assisted: bool = None) -> List:
     """
-    Remove duplicate phrases that might occur at chunk boundaries.
-    
+    Transcribe many chunks with one log-mel extraction and one generate call per batch.
+
     Args:
-        text: Combined transcription text
-        window_size: Number of words to check for duplicates
-    
+        audio_chunks: Chunks of at most 30 s each
+        batch_size: Chunks per generate call (default: see default_batch_size)
+        sample_rate: Sample rate of the audio (default: 16000)
+        return_timestamps: Also decode Whisper timestamp tokens into segments,
+                           with word times from token-level timestamps
+        tier: Transcription quality tier (see TRANSCRIPTION_TIERS)
+        assisted: Draft tokens with a small Whisper model (default:
+                  WHISPER_ASSISTED); decodes one chunk per generate call
+
     Returns:
-        Cleaned text with duplicates removed
+        One transcription per input chunk, in order. With return_timestamps,
+        one (text, segments) tuple per chunk, segment times relative to the chunk.
+
+    On an out-of-memory error the batch size is halved and the batch retried;
+    any other failure falls back to transcribing that batch chunk by chunk.
     """
-    words = text.split()
-    if len(words) <= window_size:
-        return text
-    
-    cleaned_words = []
-    skip_next = 0
-    
-    for i, word in enumerate(words):
-        if skip_next > 0:
-            skip_next -= 1
+    processor, model, device = _get_model(tier)
+    assisted = assisted_decoding_enabled(assisted)
+    generate_kwargs = _generate_kwargs(tier, assisted)
+    word_timestamps = return_timestamps and _token_timestamps_available(model, assisted)
+    # Assisted generation only supports a batch of one
+    batch_size = 1 if assisted else batch_size or default_batch_size(device)
+    transcriptions = []
+    i = 0
+    while i < len(audio_chunks):
+        batch = [_prepare_chunk(chunk) for chunk in audio_chunks[i:i + batch_size]]
+        print(f"Transcribing chunks {i + 1}-{i + len(batch)}/{len(audio_chunks)} (batch of {len(batch)})...")
+        try:
+            input_features = processor(
+                batch,
+                sampling_rate=sample_rate,
+                return_tensors="pt"
+            ).input_features.to(device, dtype=model.dtype)
+            with torch.no_grad():
+                if word_timestamps:
+                    # Token times from cross-attention alignment (DTW), cropped
+                    # to each chunk's real length rather than the 30 s padding
+                    output = model.generate(input_features, return_timestamps=True,
+                                            return_token_timestamps=True,
+                                            num_frames=[len(chunk) // _HOP_LENGTH for chunk in batch],
+                                            **generate_kwargs)
+                    predicted_ids, token_times = output["sequences"], output["token_timestamps"].tolist()
+                else:
+                    predicted_ids = model.generate(input_features, return_timestamps=return_timestamps,
+                                                   **generate_kwargs)
+                    token_times = [None] * len(batch)
+            if return_timestamps:
+                texts = []
+                for chunk, ids, times in zip(batch, predicted_ids.tolist(), token_times):
+                    segments = _segments_from_tokens(processor.tokenizer, ids, len(chunk) / sample_rate, times)
+                    texts.append((" ".join(seg["text"] for seg in segments), segments))
+            else:
+                texts = [t.strip() for t in processor.batch_decode(predicted_ids, skip_special_tokens=True)]
+        except Exception as e:
+            if _is_out_of_memory(e) and batch_size > 1:
+                batch_size //= 2
+                print(f"Out of memory; retrying with batch size {batch_size}")
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+                continue
+            print(f"Batched transcription failed ({e}); falling back to per-chunk decoding")
+            texts = [transcribe_chunk(chunk, sample_rate, tier, assisted) for chunk in batch]
+            if return_timestamps:
+                texts = [
+                    (text, [{"start": 0.0, "end": len(chunk) / sample_rate, "text": text,
+                             "words": _split_words(0.0, len(chunk) / sample_rate, text)}] if text else [])
+                    for chunk, text in zip(batch, texts)
+                ]
+        transcriptions.extend(texts)
+        i += len(batch)
+    return transcriptions
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def merge_chunk_transcripts(texts: List[str], max_overlap_words: int = 8) -> str:
+    """
+    Join consecutive chunk transcripts, dropping words repeated across each boundary.
+
+    Only the seam between chunk i and chunk i+1 is examined: the longest run
+    of (normalized) words that ends chunk i and also starts chunk i+1 is kept
+    once. Repetitions inside a chunk are left alone, and the cost is linear
+    in the number of words.
+
+    Args:
+        texts: Transcripts of consecutive, slightly overlapping chunks
+        max_overlap_words: Longest overlap to look for at a boundary
+
+    Returns:
+        The merged transcript
+    """
+    merged: List[str] = []
+    for text in texts:
+        words = text.split()
+        if not words:
             continue
-            
-        cleaned_words.append(word)
-        
-        # Check for duplicate sequences at chunk boundaries
-        if i + window_size < len(words) and len(cleaned_words) >= window_size:
-            # Look for repeated sequences
-            for check_size in range(min(window_size, 3), 0, -1):
-                if len(cleaned_words) >= check_size:
-                    recent = ' '.join(cleaned_words[-check_size:]).lower()
-                    upcoming = ' '.join(words[i+1:i+1+check_size]).lower()
-                    
-                    if recent == upcoming:
-                        skip_next = check_size
-                        break
-    
-    return ' '.join(cleaned_words)
+        tail = [_normalize_word(w) for w in merged[-max_overlap_words:]]
+        head = [_normalize_word(w) for w in words[:max_overlap_words]]
+        overlap = 0
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k]:
+                overlap = k
+                break
+        merged.extend(words[overlap:])
+    return " ".join(merged)
 
-def speech_to_text_long(audio_input: Union[str, np.ndarray], pause_threshold_s: float = 1.0) -> str:
+def speech_to_text_long(audio_input: Union[str, np.ndarray], pause_threshold_s: float = 1.0,
+                        batch_size: int = None, chunking: str = None,
+                        return_segments: bool = False, tier: str = None,
+                        assisted: bool = None) -> Union[str, dict]:
     """
     Transcribes long audio using chunking for complete transcription.
     
     Args:
         audio_input: Either a numpy array of audio data or a file path
         pause_threshold_s: Not used in this version but kept for compatibility
+        batch_size: Chunks decoded per generate call (default: adapts to memory)
+        chunking: "vad" to cut at pauses and drop silence, or "fixed" for
+                  overlapping 30 s windows (default: TRANSCRIPTION_CHUNKING or "vad")
+        return_segments: Also return timed segments with per-word times
+                         (from Whisper's token timestamps; interpolated
+                         inside each segment with assisted decoding)
+        tier: "fast", "balanced" or "accurate" (default: TRANSCRIPTION_TIER
+              or "accurate"); picks the Whisper model size and beam width
+        assisted: Speculative decoding with a whisper-tiny draft model
+                  (default: WHISPER_ASSISTED); same text as greedy decoding
+                  of the tier model at a fraction of the latency
     
     Returns:
-        Complete transcription of the audio
+        Complete transcription of the audio, or with return_segments a dict
+        {"text": str, "segments": [{"start", "end", "text", "words"}]} with
+        times in seconds from the start of the recording
     """
+    def _result(text, segments=()):
+        return {"text": text, "segments": list(segments)} if return_segments else text
+
+    tier = resolve_tier(tier)
+    assisted = assisted_decoding_enabled(assisted)
+    print(f"Transcription tier: {tier} ({TRANSCRIPTION_TIERS[tier]['model']})"
+          f"{', assisted decoding' if assisted else ''}")
+
     if audio_input is None:
         print("Error: Audio input is None.")
-        return ""
+        return _result("")
     
     # Handle string input (file path)
     if isinstance(audio_input, str):
         if not audio_input:
             print("Error: Audio input is empty string.")
-            return ""
+            return _result("")
         # Load audio from file
         try:
             import librosa
@@ -177,21 +571,23 @@ def speech_to_text_long(audio_input: Union[str, np.ndarray], pause_threshold_s:
                     audio_data = audio_data.numpy().squeeze()
             except Exception as e:
                 print(f"Error loading audio file: {e}")
-                return ""
+                return _result("")
         except Exception as e:
             print(f"Error loading audio file: {e}")
-            return ""
+            return _result("")
     else:
         # Input is already a numpy array
         audio_data = audio_input
         if not isinstance(audio_data, np.ndarray):
             print(f"Error: Expected numpy array, got {type(audio_data)}")
-            return ""
+            return _result("")
     
     # Ensure audio is float32
     if audio_data.dtype != np.float32:
         audio_data = audio_data.astype(np.float32)
     
+    chunking = chunking or default_chunking()
+    
     # Calculate duration
     duration_s = len(audio_data) / 16000
     print(f"Processing audio of duration: {duration_s:.1f} seconds")
@@ -199,26 +595,47 @@ def speech_to_text_long(audio_input: Union[str, np.ndarray], pause_threshold_s:
     # For short audio (< 30 seconds), process in one go
     if duration_s <= 30:
         print("Audio is short enough to process in one chunk")
-        transcription = transcribe_chunk(audio_data)
+        segments = []
+        if return_segments:
+            transcription, segments = transcribe_batch([audio_data], return_timestamps=True, tier=tier,
+                                                       assisted=assisted)[0]
+        else:
+            transcription = transcribe_chunk(audio_data, tier=tier, assisted=assisted)
         if transcription:
             print(f"Transcription complete: {transcription[:100]}...")
-            return transcription
+            return _result(transcription, segments)
         else:
             print("Failed to transcribe audio")
-            return ""
+            return _result("")
     
     # For long audio, use chunking
     print(f"Long audio detected ({duration_s:.1f}s), using chunking approach...")
     
-    # Split audio into chunks
-    chunks = chunk_audio(audio_data, chunk_duration_s=30, overlap_s=0.5)
-    
-    # Transcribe each chunk
+    # Split audio into chunks: at pauses (default) or fixed overlapping windows
+    chunks, chunk_spans = [], []
+    if chunking == "vad":
+        packed = vad_chunk_audio(audio_data, max_chunk_s=30)
+        chunks = [c["audio"] for c in packed]
+        chunk_spans = [c["spans"] for c in packed]
+        if not chunks:
+            print("VAD found no speech; falling back to fixed windows")
+    if not chunks:
+        chunking = "fixed"
+        chunks = chunk_audio(audio_data, chunk_duration_s=30, overlap_s=0.5)
+        step_s = 30 - 0.5
+        chunk_spans = [[(i * step_s, 0.0, len(c) / 16000)] for i, c in enumerate(chunks)]
+    
+    # Transcribe the chunks in batches
     transcriptions = []
-    for i, chunk in enumerate(chunks):
-        print(f"Transcribing chunk {i+1}/{len(chunks)}...")
-        chunk_text = transcribe_chunk(chunk)
-        
+    segments = []
+    results = transcribe_batch(chunks, batch_size=batch_size, return_timestamps=return_segments, tier=tier,
+                               assisted=assisted)
+    for i, chunk_result in enumerate(results):
+        if return_segments:
+            chunk_text, chunk_segments = chunk_result
+            segments.extend(_segments_to_source(chunk_segments, chunk_spans[i]))
+        else:
+            chunk_text = chunk_result
         if chunk_text:
             transcriptions.append(chunk_text)
             # Show progress
@@ -228,14 +645,15 @@ def speech_to_text_long(audio_input: Union[str, np.ndarray], pause_threshold_s:
     
     if not transcriptions:
         print("No transcriptions generated from any chunks")
-        return ""
+        return _result("")
     
-    # Combine all transcriptions
+    # Combine all transcriptions; overlapping fixed windows can repeat
+    # words at chunk boundaries, VAD chunks don't overlap
     print(f"Combining {len(transcriptions)} transcriptions...")
-    full_transcription = " ".join(transcriptions)
-    
-    # Remove potential duplicates at chunk boundaries
-    full_transcription = remove_duplicate_phrases(full_transcription, window_size=3)
+    if chunking == "fixed":
+        full_transcription = merge_chunk_transcripts(transcriptions)
+    else:
+        full_transcription = " ".join(transcriptions)
     
     # Final cleanup - remove extra spaces
     full_transcription = " ".join(full_transcription.split())
@@ -247,7 +665,7 @@ def speech_to_text_long(audio_input: Union[str, np.ndarray], pause_threshold_s:
     print("="*50)
     print(f"Transcription finished successfully. Total length: {len(full_transcription)} characters")
     
-    return full_transcription.strip()
+    return _result(full_transcription.strip(), segments)
 
 # Alternative function using forced_decoder_ids for better control
 # def speech_to_text_long_with_timestamps(audio_input: Union[str, np.ndarray]) -> str:
@@ -2,10 +2,14 @@ import torch
 import torchaudio
 import numpy as np
 from typing import Union
+from collections import OrderedDict
+import hashlib
 import os
+import threading
 
 # Models are loaded lazily through model_manager (no eager init here)
 from model_manager import model_manager
+from utils.emotion_summary import SILENCE_LABEL
 
 
 EMOTION_MAP = {
@@ -14,9 +18,209 @@ EMOTION_MAP = {
     "neu": "neutral",
     "ang": "angry",
 }
-def predict_emotion(audio_input: Union[str, np.ndarray], chunk_duration: float = 4.0) -> list:
+def default_ser_batch_size() -> int:
+    """Chunks per wav2vec2 forward pass (SER_BATCH_SIZE, default 16)."""
+    return max(1, int(os.getenv("SER_BATCH_SIZE", "16")))
+
+def default_ser_hop_duration():
+    """Sliding-window hop in seconds (SER_HOP_S); None keeps non-overlapping chunks."""
+    hop = os.getenv("SER_HOP_S")
+    return float(hop) if hop else None
+
+def default_ser_segment_duration() -> float:
+    """Audio per wav2vec2 pass when encoding a recording's frame features (SER_SEGMENT_S, default 30)."""
+    return float(os.getenv("SER_SEGMENT_S", "30"))
+
+def _classify_chunks(emotion_recognizer, signal: torch.Tensor, starts: list, chunk_length: int) -> list:
+    """
+    Classify several chunks of a mono signal in one forward pass.
+
+    Chunks are zero-padded to the longest one and wav_lens carries each
+    chunk's length relative to it, so padding is ignored by the model.
+    Returns one (short label, class probabilities, confidence) per chunk.
+    """
+    chunks = [signal[i:i + chunk_length] for i in starts]
+    max_length = max(len(c) for c in chunks)
+    batch = torch.zeros(len(chunks), max_length, dtype=signal.dtype)
+    for row, chunk in enumerate(chunks):
+        batch[row, :len(chunk)] = chunk
+    wav_lens = torch.tensor([len(c) / max_length for c in chunks])
+    with torch.inference_mode():
+        out_prob, score, index, text_lab = emotion_recognizer.classify_batch(batch, wav_lens)
+    classes = [
+        EMOTION_MAP.get(label, label)
+        for label in emotion_recognizer.hparams.label_encoder.decode_ndim(list(range(out_prob.shape[-1])))
+    ]
+    probs = out_prob.reshape(len(chunks), -1).cpu().numpy()
+    return [
+        (label, {c: round(float(p), 4) for c, p in zip(classes, row)}, round(float(conf), 4))
+        for label, row, conf in zip(text_lab, probs, score.reshape(-1).cpu().numpy())
+    ]
+
+class FrameFeatureCache:
+    """
+    Small in-process LRU of wav2vec2 frame features per recording.
+
+    Features are kept in float16 (~77 KB per second of audio), so the
+    default of SER_FEATURE_CACHE_ITEMS=2 recordings stays modest even for
+    long talks while still making re-windowing a recording nearly free.
+    """
+
+    def __init__(self, max_items: int = 2):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = compute()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return value
+
+_frame_cache = FrameFeatureCache(int(os.getenv("SER_FEATURE_CACHE_ITEMS", "2")))
+
+def recording_frames(emotion_recognizer, signal: torch.Tensor, segment_length: int = None) -> torch.Tensor:
+    """
+    Frame-level wav2vec2 features for a whole mono 16 kHz signal.
+
+    Computed once in segments of segment_length samples (default:
+    SER_SEGMENT_S) and cached by the signal's content, so any later set of
+    windows over the same recording is classified by pooling alone.
+    """
+    segment_length = segment_length or int(16000 * default_ser_segment_duration())
+    key = (hashlib.sha256(signal.numpy().tobytes()).hexdigest(), segment_length)
+    return _frame_cache.get_or_compute(
+        key, lambda: emotion_recognizer.encode_recording(signal, segment_samples=segment_length))
+
+def _smooth_probabilities(probs: np.ndarray, smoothing: int) -> np.ndarray:
+    """Centred moving average over ``smoothing`` rows, NaN-aware so failed
+    windows don't drag neighbours down; edges average the rows they have."""
+    known = ~np.isnan(probs[:, 0])
+    before, after = smoothing // 2, (smoothing - 1) // 2
+
+    def window_sums(values):
+        padded = np.pad(values, [(before + 1, after)] + [(0, 0)] * (values.ndim - 1))
+        totals = np.cumsum(padded, axis=0)
+        return totals[smoothing:] - totals[:-smoothing]
+
+    sums = window_sums(np.where(known[:, None], probs, 0.0))
+    counts = window_sums(known.astype(float))
+    return np.where(known[:, None], sums / np.maximum(counts, 1)[:, None], np.nan)
+
+def classify_windows(emotion_recognizer, signal: torch.Tensor, windows: list, smoothing: int = 1,
+                     runs: list = None) -> list:
+    """
+    Classify arbitrary (start_sample, end_sample) windows of a recording
+    from its cached frame features (see recording_frames).
+
+    Probabilities are smoothed with a centred moving average over
+    ``smoothing`` consecutive windows of the same run. ``runs`` gives a run
+    id per window (e.g. stretches of speech between pauses), so windows on
+    opposite sides of a pause are never averaged together; by default all
+    windows form one run. Returns one (label, class probabilities,
+    confidence) per window, or None if classification failed.
+    """
+    classes = [
+        EMOTION_MAP.get(label, label)
+        for label in emotion_recognizer.hparams.label_encoder.decode_ndim(
+            list(range(emotion_recognizer.hparams.out_n_neurons)))
+    ]
+    probs = np.full((len(windows), len(classes)), np.nan)
+    if windows:
+        try:
+            with torch.inference_mode():
+                frames = recording_frames(emotion_recognizer, signal)
+                out_prob = emotion_recognizer.classify_frames(frames, windows)[0]
+            probs = out_prob.reshape(len(windows), -1).cpu().numpy().astype(float)
+        except Exception as error:
+            print(f"Error classifying {len(windows)} windows from frame features: {error}")
+
+    if smoothing > 1 and windows:
+        runs = np.zeros(len(windows), dtype=int) if runs is None else np.asarray(runs)
+        for run in np.unique(runs):
+            rows = np.flatnonzero(runs == run)
+            probs[rows] = _smooth_probabilities(probs[rows], smoothing)
+
+    results = []
+    for row in probs:
+        if np.isnan(row).any():
+            results.append(None)
+            continue
+        best = int(np.argmax(row))
+        results.append((classes[best], {c: round(float(p), 4) for c, p in zip(classes, row)},
+                        round(float(row[best]), 4)))
+    return results
+
+# Frames used by the speech gate (25 ms divides the 4 s SER window evenly)
+_GATE_FRAME_S = 0.025
+
+def speech_windows(signal: np.ndarray, starts: list, chunk_length: int, sample_rate: int = 16000,
+                   min_speech_ratio: float = 0.2, max_flatness: float = 0.4) -> np.ndarray:
+    """
+    Decide which SER windows contain speech (vectorized over the whole buffer).
+
+    A frame counts as speech when it lies inside an energy-based speech
+    region (detect_speech_regions, the VAD used for transcription chunking)
+    and its spectrum is not noise-like: broadband sounds such as applause
+    have a high spectral flatness, voiced speech a low one. A window is
+    speech when at least ``min_speech_ratio`` of its frames are.
+
+    Returns:
+        Boolean array, one entry per window start
+    """
+    from utils.transcription import detect_speech_regions
+
+    frame = int(sample_rate * _GATE_FRAME_S)
+    num_frames = len(signal) // frame
+    if num_frames == 0:
+        return np.ones(len(starts), dtype=bool)
+
+    in_region = np.zeros(num_frames + 1, dtype=np.int8)
+    for start, end in detect_speech_regions(signal, sample_rate):
+        in_region[start // frame] += 1
+        in_region[min(-(-end // frame), num_frames)] -= 1
+    in_region = np.cumsum(in_region[:-1]) > 0
+
+    frames = signal[:num_frames * frame].reshape(num_frames, frame)
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    is_speech = in_region & (flatness < max_flatness)
+
+    counts = np.concatenate(([0], np.cumsum(is_speech)))
+    first = np.minimum(np.asarray(starts) // frame, num_frames)
+    last = np.minimum((np.asarray(starts) + chunk_length) // frame, num_frames)
+    ratio = (counts[last] - counts[first]) / np.maximum(last - first, 1)
+    return ratio >= min_speech_ratio
+
+def predict_emotion(audio_input: Union[str, np.ndarray], chunk_duration: float = 4.0,
+                    batch_size: int = None, skip_silence: bool = True,
+                    hop_duration: float = None, smoothing: int = 3) -> list:
     """
     Predicts emotions from an audio file OR an in-memory audio array.
+
+    wav2vec2 features are computed once for the recording (in segments,
+    cached by recording_frames) and every window is pooled from them, so
+    classifying the same recording again with other windows costs almost
+    nothing. Windows that can't be classified that way are encoded directly
+    in padded batches of batch_size (default: SER_BATCH_SIZE or 16). Each
+    chunk carries the predicted emotion, its probability (confidence) and
+    the full class-probability vector.
+
+    With skip_silence, windows without speech (pauses, applause) are not
+    sent to the model and appear in the timeline as "silence".
+
+    A hop_duration shorter than chunk_duration switches to sliding windows,
+    which cost about as much as non-overlapping chunks. Window probabilities
+    are then averaged over ``smoothing`` neighbouring windows of the same
+    stretch of speech, and each window reports the hop-long span around its
+    centre.
     """
     emotion_recognizer = model_manager.get_emotion_recognizer()
     try:
@@ -46,44 +250,89 @@ def predict_emotion(audio_input: Union[str, np.ndarray], chunk_duration: float =
             signal = resampler(signal)
 
         chunk_length = int(16000 * chunk_duration)
+        hop_length = int(16000 * (hop_duration or chunk_duration))
+        sliding = hop_length < chunk_length
+        step = hop_length if sliding else chunk_length
         num_samples = signal.shape[1]
         results = []
-        
-        for i in range(0, num_samples, chunk_length):
-            chunk = signal[:, i:i + chunk_length]
-            
-            # Skip chunks that are too short
-            if chunk.shape[1] < 1600:
-                continue
 
-            # Ensure chunk is on CPU for SpeechBrain
-            chunk = chunk.cpu()
-            
+        window_starts = list(range(0, max(num_samples - chunk_length, 0) + 1, step)) if sliding \
+            else list(range(0, num_samples, chunk_length))
+        if sliding and window_starts[-1] + chunk_length < num_samples:
+            window_starts.append(window_starts[-1] + step)
+        last_start = window_starts[-1] if window_starts else 0
+
+        def window_entry(i):
+            # Overlapping windows each own the hop-long span around their
+            # centre, so the timeline stays contiguous and non-overlapping
+            return {
+                "chunk": i // step + 1,
+                "start_time": round((i + (chunk_length - step) // 2 if i else 0) / 16000, 2),
+                "end_time": round((num_samples if i == last_start
+                                   else min(i + (chunk_length + step) // 2, num_samples)) / 16000, 2),
+            }
+
+        # Skip chunks that are too short; SpeechBrain runs on CPU
+        chunk_starts = [i for i in window_starts if min(chunk_length, num_samples - i) >= 1600]
+        signal = signal[0].cpu()
+        batch_size = batch_size or default_ser_batch_size()
+
+        silent_starts = []
+        if skip_silence and chunk_starts:
+            has_speech = speech_windows(signal.numpy(), chunk_starts, chunk_length)
+            silent_starts = [i for i, keep in zip(chunk_starts, has_speech) if not keep]
+            if silent_starts:
+                print(f"Skipping SER for {len(silent_starts)} of {len(chunk_starts)} windows without speech")
+        for i in silent_starts:
+            results.append({**window_entry(i), "emotion": SILENCE_LABEL})
+        silent = set(silent_starts)
+
+        # Both modes pool their windows from the recording's cached frame
+        # features, so re-analysing with other windows skips the encoder
+        starts = [i for i in chunk_starts if i not in silent]
+        windows = [(i, min(i + chunk_length, num_samples)) for i in starts]
+        # Each pause starts a new run, so smoothing stays within speech
+        run, runs = 0, []
+        for i in chunk_starts:
+            if i in silent:
+                run += 1
+            else:
+                runs.append(run)
+        predictions = dict(zip(starts, classify_windows(
+            emotion_recognizer, signal, windows, smoothing if sliding else 1, runs)))
+
+        # Windows the frame features couldn't classify are encoded directly
+        # in padded batches, one by one if a batch fails
+        failed = [i for i in starts if predictions[i] is None]
+        for b in range(0, len(failed), batch_size):
+            batch = failed[b:b + batch_size]
             try:
-                # Create a temporary tensor that SpeechBrain can process
-                wav_lens = torch.tensor([1.0])
-                
-                # Call the classifier
-                out_prob, score, index, text_lab = emotion_recognizer.classify_batch(chunk, wav_lens)
-                
-                predicted_emotion_short = text_lab[0]
-                predicted_emotion_full = EMOTION_MAP.get(predicted_emotion_short, predicted_emotion_short)
-
-                chunk_index = i // chunk_length
-                start_time = round(chunk_index * chunk_duration, 2)
-                end_time = round(min((chunk_index + 1) * chunk_duration, num_samples / 16000), 2)
-                
-                results.append({
-                    "chunk": chunk_index + 1,
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "emotion": predicted_emotion_full
-                })
-            except Exception as chunk_error:
-                print(f"Error processing chunk {i // chunk_length + 1}: {chunk_error}")
-                # Continue with next chunk instead of failing entirely
+                labels = _classify_chunks(emotion_recognizer, signal, batch, chunk_length)
+            except Exception as batch_error:
+                print(f"Error processing {len(batch)} windows as a batch: {batch_error}")
+                labels = []
+                for i in batch:
+                    try:
+                        labels.extend(_classify_chunks(emotion_recognizer, signal, [i], chunk_length))
+                    except Exception as chunk_error:
+                        print(f"Error processing chunk {window_entry(i)['chunk']}: {chunk_error}")
+                        labels.append(None)
+            predictions.update(zip(batch, labels))
+
+        for i, prediction in predictions.items():
+            if prediction is None:
                 continue
+            predicted_emotion_short, probabilities, confidence = prediction
+            predicted_emotion_full = EMOTION_MAP.get(predicted_emotion_short, predicted_emotion_short)
+
+            results.append({
+                **window_entry(i),
+                "emotion": predicted_emotion_full,
+                "confidence": confidence,
+                "probabilities": probabilities,
+            })
             
+        results.sort(key=lambda r: r["chunk"])
         if results:
             print(f"Vocal emotion analysis completed successfully. Processed {len(results)} chunks.")
         else: